@@ -5,7 +5,7 @@ Created on Tue Nov 23 19:44:07 2021
 For personal, non-commercial use only! Do not republish and alter without
 my permission.
 
-Requirements: numpy, scipy.optimize
+Requirements: numpy, scipy.optimize, scipy.sparse. Optional: highspy
 
 Usage: use in interactive mode. assign a variable to solve("name of item or
 recipe to maximize"). returns a list of two items, one is the resource
@@ -23,12 +23,25 @@ resource allocation.
 
 nlextract(str, float) takes a raw resource and a desired quota and outputs
 optimal clock speed assignments and their total power cost.
+nlextract_batch(str, quotas) does the same for many quotas at once.
 """
 import numpy as np
-from scipy.optimize import linprog
+from scipy.optimize import linprog, milp, LinearConstraint, Bounds, OptimizeResult
+from scipy.sparse import coo_matrix, csr_matrix, vstack, hstack, bmat
+from scipy.sparse.csgraph import connected_components
 from math import log
+from fractions import Fraction
 import warnings
+import logging
+import multiprocessing
+import time
+from collections import deque
+try:
+    import highspy
+except ImportError:
+    highspy = None # optional, enables warm-started re-solves
 warnings.filterwarnings("ignore")
+logger = logging.getLogger("optimizerSomer")
 
 # ----- general settings -----
 MinerMK = 3  # 1 to 3
@@ -40,6 +53,14 @@ TotalSomersloops = 104
 PumpsPerPipe = 0.0  # 1 per mk1 + 2 per mk2
 ExtractClockSteps = 100 # extractor's clock speed domain from 1% to max is divded in this many points. more: greater accuracy and computational expense
 SloopClockSteps = 2 # overslooped clock speed domain from 100% to 250% is divided in this many points.
+ColGenInitialClocks = 3 # extraction="colgen" starts each node class with this many evenly spaced clocks, extraction="oa" with this many tangent cuts
+OATolerance = 1e-6 # extraction="oa" adds tangent cuts until every node class's power is within this (relative) of its convex curve
+Processes = 1 # worker processes for solve()'s power augmenter sweep. more than 1 solves the combinations in parallel
+BlockMinSize = 50 # blocks with fewer recipes stay in the decomposition's master problem
+DecompositionCache = 8 # block decompositions kept for repeat solves, the least recently used is dropped first
+MipGap = 1e-4 # relative gap at which the integer sloop MILP stops
+LexTolerance = 1e-9 # relative slack kept on earlier objectives in lexicographic stages
+Presolve = False # prune recipes that can't contribute to the target before solving, see presolve(). the result is verified by pricing.
 
 MinerBasePower = {1: 5, 2: 12, 3: 30}
 MinerBaseSpeed = np.array([[30, 60, 120], [60, 120, 240], [120, 240, 480]])
@@ -48,15 +69,17 @@ PipeCapacity = {1: 300, 2: 600}
 GeothermalBasePower = 100.0 # on impure Geysir
 ProcPowerExponent = log(2.5, 2)
 
-def FreePower(unfueled_APAs: int, fueled_APAs: int):
-    if FreeExtraPower >= 0:
-        return (sum(GeysersOccupied[i] * GeothermalBasePower * 2**i for i in range(3)) + FreeExtraPower + 500 * (unfueled_APAs + fueled_APAs)) * (1 + (unfueled_APAs + 3 * fueled_APAs)/10)
+def FreePower(unfueled_APAs: int, fueled_APAs: int, extra=None):
+    """extra overrides FreeExtraPower"""
+    if extra is None:
+        extra = FreeExtraPower
+    if extra >= 0:
+        return (sum(GeysersOccupied[i] * GeothermalBasePower * 2**i for i in range(3)) + extra + 500 * (unfueled_APAs + fueled_APAs)) * (1 + (unfueled_APAs + 3 * fueled_APAs)/10)
     else:
-        return (sum(GeysersOccupied[i] * GeothermalBasePower * 2**i for i in range(3)) + 500 * (unfueled_APAs + fueled_APAs)) * (1 + (unfueled_APAs + 3 * fueled_APAs)/10) + FreeExtraPower
+        return (sum(GeysersOccupied[i] * GeothermalBasePower * 2**i for i in range(3)) + 500 * (unfueled_APAs + fueled_APAs)) * (1 + (unfueled_APAs + 3 * fueled_APAs)/10) + extra
 
-RecipesByName = dict()
-Recipes = list()
 Items = ["Water", ] # only needs to include items for which we enforce generation=destruction, i.e. not AWESOME points.
+ItemRows = {"Water":0} # item -> index in Items
 Buildings = dict()
 #LimResources = set()
 ExtractBuildings = dict()
@@ -234,13 +257,76 @@ class PowerRecipe(Recipe):
         return self.building.power(unfueled_APAs=unfueled_APAs, fueled_APAs=fueled_APAs, clock=clock)
 
 
+class SloopRecipe(Recipe):
+    def __init__(self, base: Recipe, sloops:int, clock:float):
+        if type(base) != Recipe:
+            raise KeyError("invalid recipe type to derive SloopRecipe from")
+        self.name = base.name + "-s=" + str(sloops) + clockSuffix(clock)
+        self.inputs = base.inputs
+        self.outputs = base.outputs
+        self.base = base
+        self.sloops = sloops
+        self.clock = clock
+    
+    def power(self):
+        c = self.clock
+        s = self.sloops
+        return self.base.power(clock=c, sloops=s)
+    
+    def rate(self, item: str):
+        c = self.clock
+        s = self.sloops
+        return self.base.rate(item, clock=c, sloops=s)
+
+def sloopCoefficients(base: Recipe, sloops, clocks) -> tuple:
+    """item rates and power of base's SloopRecipes at arrays of sloops and clocks, same as SloopRecipe.rate and .power"""
+    b = base.building
+    clocks = np.asarray(clocks, dtype=float)
+    boost = 1 + np.asarray(sloops, dtype=float) / b.sloots
+    rates = dict()
+    for item in base.inputs.keys() | base.outputs.keys():
+        v = np.zeros(len(clocks))
+        if item in base.inputs:
+            v += base.inputs[item] * clocks
+        if item in base.outputs:
+            v -= base.outputs[item] * clocks * boost
+        rates[item] = v
+    return rates, b._base * clocks**b._exponent * boost**2
+
+
+def extractPrefix(building: str, resource: str, val: int) -> str:
+    """name of a node class's ExtractRecipes up to the clock suffix. validates the node class."""
+    if building not in ("Miner", "Oil Extractor", "Resource Well Pressurizer"):
+        raise ValueError("Invalid building: "+building)
+    if building == "Resource Well Pressurizer":
+        if resource not in Wells:
+            raise ValueError("Wells not found for resource: "+resource)
+        if val not in Wells[resource]:
+            raise ValueError("No "+resource+" well found with value: "+str(val))
+        return "extract_Well-" + "".join(resource.split()) + "-" + str(val)
+    if resource not in Nodes:
+        raise ValueError("Nodes not found for resource: "+resource)
+    if val not in Nodes[resource]:
+        raise ValueError("No "+resource+" node found with rarity: "+str(val))
+    if val == 1:
+        rarity = "impure"
+    elif val == 2:
+        rarity = "normal"
+    elif val == 4:
+        rarity = "pure"
+    else:
+        raise ValueError("Invalid rarity for resource "+resource)
+    return "extract_" + "".join(building.split()) + "-" + "".join(resource.split()) + "-" + rarity
+
+def clockSuffix(clock: float) -> str:
+    return "-@" + f"{clock*100:.7g}" + "%"
+
 class ExtractRecipe(Recipe):
     num = 0
     def __init__(self, building: str, resource: str, val: int, clock: float):
-        if building not in ("Miner", "Oil Extractor", "Resource Well Pressurizer"):
-            raise ValueError("Invalid building: "+building)
         if not ((clock >= 0.01) and (clock <= 2.5)):
             raise ValueError("Invalid clock setting:"+str(clock))
+        self.name = extractPrefix(building, resource, val) + clockSuffix(clock)
         self.building = building
         self.resource = resource
         self.val = val
@@ -248,33 +334,14 @@ class ExtractRecipe(Recipe):
         self.outputs = {resource:None,}
         self.clock = clock
         if building == "Resource Well Pressurizer":
-            if resource not in Wells:
-                raise ValueError("Wells not found for resource: "+resource)
-            if val not in Wells[resource]:
-                raise ValueError("No "+resource+" well found with value: "+str(val))
             self._baseRate = 30.0 * val
             self._basePower = 150.0
-            self.name = "extract_Well-" + "".join(resource.split()) + "-" + str(val) + "-@" + f"{clock*100:.7g}" + "%"
+        elif building == "Oil Extractor":
+            self._baseRate = 60.0 * val
+            self._basePower = 40.0
         else:
-            if resource not in Nodes:
-                raise ValueError("Nodes not found for resource: "+resource)
-            if val not in Nodes[resource]:
-                raise ValueError("No "+resource+" node found with rarity: "+str(val))
-            if building == "Oil Extractor":
-                self._baseRate = 60.0 * val
-                self._basePower = 40.0
-            else:
-                self._baseRate = 30.0 * 2**(MinerMK-1) * val
-                self._basePower = MinerBasePower[MinerMK]
-            if val == 1:
-                rarity = "impure"
-            elif val == 2:
-                rarity = "normal"
-            elif val == 4:
-                rarity = "pure"
-            else:
-                raise ValueError("Invalid rarity for resource "+resource)
-            self.name = "extract_" + "".join(building.split()) + "-" + "".join(resource.split()) + "-" + rarity + "-@" + f"{clock*100:.7g}" + "%"
+            self._baseRate = 30.0 * 2**(MinerMK-1) * val
+            self._basePower = MinerBasePower[MinerMK]
         ExtractRecipe.num += 1
         return None
     
@@ -295,6 +362,280 @@ class ExtractRecipe(Recipe):
             return -min(lim, self._baseRate * self.clock)
         return -self._baseRate * self.clock
 
+def extractBase(building: str, val: int) -> tuple:
+    """rate at 100% clock, power at 100% clock and rate limit of an extraction node class"""
+    if building == "Resource Well Pressurizer":
+        return 30.0 * val, 150.0, np.inf
+    elif building == "Oil Extractor":
+        return 60.0 * val, 40.0, PipeCapacity[PipeMK]
+    return 30.0 * 2**(MinerMK-1) * val, MinerBasePower[MinerMK], BeltCapacity[BeltMK]
+
+def extractCoefficients(building: str, val: int, clocks) -> tuple:
+    """rate and power of a node class's ExtractRecipes at an array of clocks, same as ExtractRecipe.rate and .power"""
+    clocks = np.asarray(clocks, dtype=float)
+    rate, power, lim = extractBase(building, val)
+    return -np.minimum(lim, rate * clocks), power * clocks**ProcPowerExponent
+
+class RecipeTable:
+    """
+    All registered recipes as LP columns, stored as a structure of arrays.
+    Ordinary recipes are kept as objects; extraction clock points and sloop
+    variants only as (family, base, clock, sloops, building) entries, with
+    their names and ExtractRecipe/SloopRecipe views created on request.
+    base is the node class index for EXTRACT, the base recipe's column for
+    SLOOP and the index into objects otherwise.
+    """
+    PLAIN, EXTRACT, SLOOP = 0, 1, 2
+
+    def __init__(self):
+        self.objects = list()
+        self.objectcols = list()
+        self.nodeclasses = list() # (resource, building, val)
+        self.nodeclassids = dict()
+        self.buildings = list()
+        self.buildingids = dict()
+        self._names = dict() # name -> column, PLAIN recipes only
+        self._prefixes = dict() # extractPrefix -> node class index
+        self._n = 0
+        self._family = np.zeros(0, dtype=np.int8)
+        self._base = np.zeros(0, dtype=np.int32)
+        self._clock = np.zeros(0, dtype=float)
+        self._sloops = np.zeros(0, dtype=np.int8)
+        self._building = np.zeros(0, dtype=np.int16)
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i: int) -> Recipe:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("recipe column out of range")
+        f = self._family[i]
+        if f == RecipeTable.PLAIN:
+            return self.objects[self._base[i]]
+        elif f == RecipeTable.EXTRACT:
+            resource, building, val = self.nodeclasses[self._base[i]]
+            return ExtractRecipe(building, resource, val, float(self._clock[i]))
+        return SloopRecipe(self[int(self._base[i])], int(self._sloops[i]), float(self._clock[i]))
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for x in ("_family", "_base", "_clock", "_sloops", "_building"):
+            state[x] = state[x][:self._n].copy()
+        return state
+
+    @property
+    def family(self) -> np.ndarray:
+        return self._family[:self._n]
+
+    @property
+    def base(self) -> np.ndarray:
+        return self._base[:self._n]
+
+    @property
+    def clock(self) -> np.ndarray:
+        return self._clock[:self._n]
+
+    @property
+    def sloops(self) -> np.ndarray:
+        return self._sloops[:self._n]
+
+    @property
+    def building(self) -> np.ndarray:
+        return self._building[:self._n]
+
+    def name(self, i: int) -> str:
+        f = self._family[i]
+        if f == RecipeTable.PLAIN:
+            return self.objects[self._base[i]].name
+        elif f == RecipeTable.EXTRACT:
+            resource, building, val = self.nodeclasses[self._base[i]]
+            return extractPrefix(building, resource, val) + clockSuffix(self._clock[i])
+        return self.name(self._base[i]) + "-s=" + str(self._sloops[i]) + clockSuffix(self._clock[i])
+
+    def column(self, name: str):
+        """column of the named recipe, or None."""
+        if name in self._names:
+            return self._names[name]
+        if not (name.endswith("%") and "-@" in name):
+            return None
+        prefix, clock = name[:-1].rsplit("-@", 1)
+        if prefix in self._prefixes:
+            cols = np.flatnonzero((self.family == RecipeTable.EXTRACT) & (self.base == self._prefixes[prefix]))
+        elif "-s=" in prefix:
+            basename, sloops = prefix.rsplit("-s=", 1)
+            if basename not in self._names or not sloops.isdigit():
+                return None
+            cols = np.flatnonzero((self.family == RecipeTable.SLOOP) & (self.base == self._names[basename]) & (self.sloops == int(sloops)))
+        else:
+            return None
+        for i in cols:
+            if f"{self._clock[i]*100:.7g}" == clock:
+                return int(i)
+        return None
+
+    def generated(self, name: str):
+        """
+        ExtractRecipe or SloopRecipe an unregistered "-@x%" name stands for,
+        as in column generation and outer approximation plans, or None.
+        The clock is as precise as the name.
+        """
+        if not (name.endswith("%") and "-@" in name):
+            return None
+        prefix, clock = name[:-1].rsplit("-@", 1)
+        try:
+            clock = float(clock) / 100
+        except ValueError:
+            return None
+        if prefix in self._prefixes:
+            resource, building, val = self.nodeclasses[self._prefixes[prefix]]
+            return ExtractRecipe(building, resource, val, clock)
+        if "-s=" in prefix:
+            basename, sloops = prefix.rsplit("-s=", 1)
+            if basename in self._names and sloops.isdigit():
+                return SloopRecipe(self[self._names[basename]], int(sloops), clock)
+        return None
+
+    def __contains__(self, name: str) -> bool:
+        return self.column(name) is not None
+
+    def groups(self, family: int) -> dict:
+        """base -> array of the columns of that base in the given family, in registration order"""
+        cols = np.flatnonzero(self.family == family)
+        bases = self.base[cols]
+        order = np.argsort(bases, kind="stable")
+        cols, bases = cols[order], bases[order]
+        keys, starts = np.unique(bases, return_index=True)
+        return dict(zip(keys.tolist(), np.split(cols, starts[1:])))
+
+    def _buildingid(self, name: str) -> int:
+        if name not in self.buildingids:
+            self.buildingids[name] = len(self.buildings)
+            self.buildings.append(name)
+        return self.buildingids[name]
+
+    def _extend(self, k: int, family: int, base, clock, sloops, building: int):
+        n = self._n + k
+        if n > len(self._family):
+            cap = max(n, 2 * len(self._family), 256)
+            for x in ("_family", "_base", "_clock", "_sloops", "_building"):
+                arr = getattr(self, x)
+                new = np.zeros(cap, dtype=arr.dtype)
+                new[:self._n] = arr[:self._n]
+                setattr(self, x, new)
+        self._family[self._n:n] = family
+        self._base[self._n:n] = base
+        self._clock[self._n:n] = clock
+        self._sloops[self._n:n] = sloops
+        self._building[self._n:n] = building
+        first = self._n
+        self._n = n
+        return np.arange(first, n)
+
+    def add(self, r: Recipe) -> int:
+        if type(r) == ExtractRecipe:
+            return int(self.add_extract(r.building, r.resource, r.val, [r.clock])[0])
+        elif type(r) == SloopRecipe:
+            return int(self.add_sloops(r.base.name, [r.sloops], [r.clock])[0])
+        if r.name in self:
+            raise ValueError("duplicate recipe name")
+        building = getattr(r, "building", None)
+        building = building.name if isinstance(building, Building) else ""
+        col = int(self._extend(1, RecipeTable.PLAIN, len(self.objects), 1.0, 0, self._buildingid(building))[0])
+        self._names[r.name] = col
+        self.objects.append(r)
+        self.objectcols.append(col)
+        return col
+
+    def add_extract(self, building: str, resource: str, val: int, clocks) -> np.ndarray:
+        clocks = np.asarray(clocks, dtype=float)
+        if not np.all((clocks >= 0.01) & (clocks <= 2.5)):
+            raise ValueError("Invalid clock setting:"+str(clocks[(clocks < 0.01) | (clocks > 2.5)][0]))
+        prefix = extractPrefix(building, resource, val)
+        key = (resource, building, val)
+        if key not in self.nodeclassids:
+            self.nodeclassids[key] = len(self.nodeclasses)
+            self.nodeclasses.append(key)
+            self._prefixes[prefix] = self.nodeclassids[key]
+        k = self.nodeclassids[key]
+        old = self.clock[(self.family == RecipeTable.EXTRACT) & (self.base == k)]
+        labels = [f"{c*100:.7g}" for c in np.concatenate([old, clocks])]
+        if len(set(labels)) < len(labels):
+            raise ValueError("duplicate recipe name")
+        return self._extend(len(clocks), RecipeTable.EXTRACT, k, clocks, 0, self._buildingid(building))
+
+    def add_sloops(self, basename: str, sloops, clocks) -> np.ndarray:
+        base = self._names[basename]
+        sloops = np.asarray(sloops, dtype=np.int8)
+        clocks = np.asarray(clocks, dtype=float)
+        return self._extend(len(clocks), RecipeTable.SLOOP, base, clocks, sloops, self._building[base])
+
+
+class RecipeNames:
+    """read-only mapping recipe name -> recipe view (or column, if columns=True) over a RecipeTable"""
+    def __init__(self, table: RecipeTable, columns=False):
+        self._table = table
+        self._columns = columns
+
+    def __getitem__(self, name: str):
+        col = self._table.column(name)
+        if col is None:
+            r = None if self._columns else self._table.generated(name)
+            if r is None:
+                raise KeyError(name)
+            return r
+        if self._columns:
+            return col
+        return self._table[col]
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name: str) -> bool:
+        return self._table.column(name) is not None
+
+    def __len__(self):
+        return len(self._table)
+
+    def __iter__(self):
+        for i in range(len(self._table)):
+            yield self._table.name(i)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for i in range(len(self._table)):
+            yield i if self._columns else self._table[i]
+
+    def items(self):
+        for i in range(len(self._table)):
+            yield self._table.name(i), (i if self._columns else self._table[i])
+
+
+Recipes = RecipeTable()
+RecipesByName = RecipeNames(Recipes)
+RecipeColumns = RecipeNames(Recipes, columns=True)
+
+def regItem(item: str):
+    global Items, ItemRows
+    if item not in ItemRows:
+        ItemRows[item] = len(Items)
+        Items.append(item)
+    return None
+
+def regRecipe(r: Recipe):
+    Recipes.add(r)
+    return None
+
 def maxExtractClock(resource: str, building: str, val: int) -> float:
     if resource not in ExtractBuildings:
         raise KeyError(resource+" has no registered extraction buildings.")
@@ -308,26 +649,19 @@ def maxExtractClock(resource: str, building: str, val: int) -> float:
     return lim
 
 def regER(resource: str, building: str):
-    global ExtractBuildings, RecipesByName, Recipes, Items
+    global ExtractBuildings
     if resource not in ExtractBuildings:
         ExtractBuildings[resource] = list()
     if building not in ExtractBuildings[resource]:
         ExtractBuildings[resource].append(building)
-    if resource not in Items:
-        Items.append(resource)
+    regItem(resource)
     if building == "Resource Well Pressurizer":
         values = Wells[resource]
     else:
         values = Nodes[resource]
     for val in values:
         maxclock = maxExtractClock(resource, building, val)
-        clocks = np.linspace(0.01, maxclock, ExtractClockSteps)
-        for c in clocks:
-            r = ExtractRecipe(building, resource, val, c)
-            if r.name in RecipesByName:
-                raise ValueError("duplicate recipe name")
-            RecipesByName[r.name] = r
-            Recipes.append(r)
+        Recipes.add_extract(building, resource, val, np.linspace(0.01, maxclock, ExtractClockSteps))
     return None
 
 # ----- extraction recipes -----
@@ -352,14 +686,9 @@ def regR(name: str, inputs: dict, outputs: dict, building: str):
         r = PowerRecipe(name, inputs, outputs, building)
     else:
         r = Recipe(name, inputs, outputs, building)
-    global RecipesByName, Recipes, Items
     for x in inputs.keys() | outputs.keys():
-        if x not in Items:
-            Items.append(x)
-    if r.name in RecipesByName:
-        raise ValueError("duplicate recipe name")
-    RecipesByName[r.name] = r
-    Recipes.append(r)
+        regItem(x)
+    regRecipe(r)
     return None
 
 regR("pump_Water", dict(), {"Water":120}, "Water Extractor")
@@ -767,34 +1096,11 @@ regR("a_DarkMatterTrap", {"Time Crystal":30, "Dark Matter Residue":150}, {"Dark
 regR("a_Dark-IonFuel", {"Packaged Rocket Fuel":240, "Dark Matter Crystal":80}, {"Ionized Fuel":200, "Compacted Coal":40}, "Converter")
 
 # ---- oversloop! ----
-class SloopRecipe(Recipe):
-    def __init__(self, base: Recipe, sloops:int, clock:float):
-        if type(base) != Recipe:
-            raise KeyError("invalid recipe type to derive SloopRecipe from")
-        self.name = base.name + "-s=" + str(sloops) + "-@" + f"{clock*100:.7g}" + "%"
-        self.inputs = base.inputs
-        self.outputs = base.outputs
-        self.base = base
-        self.sloops = sloops
-        self.clock = clock
-    
-    def power(self):
-        c = self.clock
-        s = self.sloops
-        return self.base.power(clock=c, sloops=s)
-    
-    def rate(self, item: str):
-        c = self.clock
-        s = self.sloops
-        return self.base.rate(item, clock=c, sloops=s)
-
-for r in Recipes:
+for r in list(Recipes.objects):
     if type(r) == Recipe and r.building.sloots > 0:
-        for s in range(1,r.building.sloots + 1):
-            for c in np.linspace(1.0, 2.5, num=SloopClockSteps):
-                r2 = SloopRecipe(r, s, c)
-                RecipesByName[r2.name] = r2
-                Recipes.append(r2)
+        sloops = np.repeat(np.arange(1, r.building.sloots + 1), SloopClockSteps)
+        clocks = np.tile(np.linspace(1.0, 2.5, num=SloopClockSteps), r.building.sloots)
+        Recipes.add_sloops(r.name, sloops, clocks)
 
 class MilestoneRecipe(Recipe):
     def __init__(self, name: str, requirements: dict):
@@ -813,14 +1119,9 @@ class MilestoneRecipe(Recipe):
 
 def regMR(name: str, requirements: dict):
     r = MilestoneRecipe(name, requirements)
-    global RecipesByName, Recipes, Items
     for x in r.inputs.keys():
-        if x not in Items:
-            Items.append(x)
-    if r.name in RecipesByName:
-        raise ValueError("duplicate recipe name")
-    RecipesByName[r.name] = r
-    Recipes.append(r)
+        regItem(x)
+    regRecipe(r)
     return None
 
 # ----- Milestone recipes -----
@@ -852,14 +1153,9 @@ class SinkRecipe(Recipe):
 
 def regS(item: str, points: int):
     r = SinkRecipe(item, points)
-    global RecipesByName, Recipes, Items
     for x in r.inputs.keys():
-        if x not in Items:
-            Items.append(x)
-    if r.name in RecipesByName:
-        raise ValueError("duplicate recipe name")
-    RecipesByName[r.name] = r
-    Recipes.append(r)
+        regItem(x)
+    regRecipe(r)
     return None
 
 # ----- Sink items -----
@@ -1002,119 +1298,1999 @@ regS("Thermal Propulsion Rocket",728508)
 regS("Ballistic Warp Drive",2895334)
 
 np.set_printoptions(precision=2, suppress=True)
-solver_options = {'autoscale':True}
-# ----- solving -----
-def solve_sub(target: str, unfueled_APAs: int, fueled_APAs: int, item_offsets=dict(), penalty=0.0, outputMatrices=False, buildlimit=None):
-    # goal
-    c = np.zeros(len(Recipes))
-    if target == "AWESOME points" or target in Items:
-        for i in range(len(Recipes)):
-            c[i] = Recipes[i].rate(target)
-    elif target in RecipesByName:
-        c[Recipes.index(RecipesByName[target])] = -1
-    else:
-        raise ValueError("Target not recognized.")
-    c += penalty
-    # inequalities: power and number of wells/nodes of each value of each resource
-    A_ub = np.zeros(len(Recipes))
-    for i in range(len(Recipes)):
-        if type(Recipes[i]) == PowerRecipe:
-            A_ub[i] = Recipes[i].power(unfueled_APAs=unfueled_APAs, fueled_APAs=fueled_APAs)
+solver_options = dict()
+solver_methods = ('highs-ds', 'highs', 'highs-ipm') # only the HiGHS methods accept sparse constraint matrices
+SolverBackend = "auto" # "auto" (resident HiGHS models where highspy is installed, linprog otherwise), "linprog", "highspy" (needs highspy) or "numpy" (dense reference simplex, small models only)
+# ----- compiled model -----
+def dominatedColumns(A, points, power, sloops) -> np.ndarray:
+    """
+    Marks the columns of one recipe family that another member dominates:
+    item rates (and points) are lam times the other's for some 0 < lam <= 1,
+    while power and sloops are at least lam times as high. Any amount of the
+    dominated column can then be replaced at no higher power, sloop or node
+    use. With item balances as equalities, only proportional rates qualify.
+    Of exact duplicates, the first one is kept.
+    """
+    A = np.vstack([A[np.unique(A.indices)].toarray(), points])
+    k = A.shape[1]
+    dom = np.zeros(k, dtype=bool)
+    norm = np.abs(A).max(axis=0)
+    if k < 2 or not (norm > 0).all():
+        return dom
+    # columns with the same rate direction
+    groups = dict()
+    direction = np.round(A / norm, 9).T
+    for j in range(k):
+        key = direction[j].tobytes()
+        if key not in groups:
+            groups[key] = list()
+        groups[key].append(j)
+    for idx in groups.values():
+        if len(idx) < 2:
+            continue
+        idx = np.array(idx)
+        lam = norm[idx][:, None] / norm[idx][None, :] # [j, k]: column j is lam times column k
+        p, s = power[idx], sloops[idx]
+        eps = 1e-12
+        ok = (lam <= 1 + eps) & (lam * p[None, :] <= p[:, None] + eps * np.abs(p[:, None])) & (lam * s[None, :] <= s[:, None] + eps)
+        strict = (lam < 1 - eps) | (lam * p[None, :] < p[:, None] - eps * np.abs(p[:, None])) | (lam * s[None, :] < s[:, None] - eps)
+        first = np.arange(len(idx))[None, :] < np.arange(len(idx))[:, None]
+        ok &= strict | first
+        np.fill_diagonal(ok, False)
+        dom[idx] = ok.any(axis=1)
+    return dom
+
+class CompiledModel:
+    """
+    LP coefficients of all registered recipes, built once from Recipes, Items
+    and ExtractBuildings. Views returned by view() only patch the vectors that
+    depend on target, power augmenters and item offsets.
+    """
+    def __init__(self):
+        self.recipes = Recipes # append-only, the model covers the non-dominated ones of its first columns
+        self.items = list(Items)
+        self.itemrows = dict(ItemRows)
+        # node and well classes, one inequality row each
+        self.nodeclasses = nodeClasses()
+        self.noderows = dict((self.nodeclasses[i], i) for i in range(len(self.nodeclasses)))
+        extractgroups = Recipes.groups(RecipeTable.EXTRACT)
+        n = len(Recipes)
+        self.power = np.zeros(n) # PowerRecipes at zero power augmenters
+        self.points = np.zeros(n) # "AWESOME points" is not a balanced item
+        self.sloops = np.zeros(n)
+        eq_rows, eq_cols, eq_vals = list(), list(), list()
+        powercols = list()
+        for rec, i in zip(Recipes.objects, Recipes.objectcols):
+            if type(rec) == PowerRecipe:
+                powercols.append(i)
+            self.power[i] = rec.power()
+            for item in rec.inputs.keys() | rec.outputs.keys():
+                if item == "AWESOME points":
+                    self.points[i] = rec.rate(item)
+                    continue
+                eq_rows.append(self.itemrows[item])
+                eq_cols.append(i)
+                eq_vals.append(rec.rate(item))
+        eq_rows, eq_cols, eq_vals = [np.array(eq_rows, dtype=int)], [np.array(eq_cols, dtype=int)], [np.array(eq_vals)]
+        # extraction clock points and sloop variants, one broadcast per family
+        for nodeclass, cols in extractgroups.items():
+            resource, building, val = Recipes.nodeclasses[nodeclass]
+            rates, self.power[cols] = extractCoefficients(building, val, Recipes.clock[cols])
+            eq_rows.append(np.full(len(cols), self.itemrows[resource]))
+            eq_cols.append(cols)
+            eq_vals.append(rates)
+        sloopgroups = Recipes.groups(RecipeTable.SLOOP)
+        for basecol, cols in sloopgroups.items():
+            sloops = Recipes.sloops[cols]
+            rates, self.power[cols] = sloopCoefficients(Recipes[basecol], sloops, Recipes.clock[cols])
+            self.sloops[cols] = sloops
+            for item in rates:
+                if item == "AWESOME points":
+                    self.points[cols] = rates[item]
+                    continue
+                eq_rows.append(np.full(len(cols), self.itemrows[item]))
+                eq_cols.append(cols)
+                eq_vals.append(rates[item])
+        eq_rows, eq_cols, eq_vals = np.concatenate(eq_rows), np.concatenate(eq_cols), np.concatenate(eq_vals)
+        A_items = coo_matrix((eq_vals, (eq_rows, eq_cols)), shape=(len(self.items), n)).tocsc()
+        A_items.sum_duplicates()
+        # drop dominated clock points and sloop variants
+        active = np.ones(n, dtype=bool)
+        self.dominated = dict()
+        families = [(Recipes.name(cols[0])[:-1].rsplit("-@", 1)[0], cols) for cols in extractgroups.values()]
+        families += [(Recipes.name(basecol) + " sloop variants", cols) for basecol, cols in sloopgroups.items()]
+        for label, cols in families:
+            dom = dominatedColumns(A_items[:, cols], self.points[cols], self.power[cols], self.sloops[cols])
+            if dom.any():
+                active[cols[dom]] = False
+                self.dominated[label] = int(dom.sum())
+                logger.info("%s: %d of %d columns dominated", label, dom.sum(), len(cols))
+        # model columns are the active recipe columns
+        self.cols = np.flatnonzero(active)
+        self.n = len(self.cols)
+        self.position = np.full(n, -1)
+        self.position[self.cols] = np.arange(self.n)
+        self.power = self.power[self.cols]
+        self.points = self.points[self.cols]
+        self.sloops = self.sloops[self.cols]
+        self.powercols = self.position[np.array(powercols, dtype=int)]
+        self.A_items = A_items[:, self.cols].tocsr()
+        self.nodecols = list()
+        for key in self.nodeclasses:
+            cols = extractgroups.get(Recipes.nodeclassids.get(key), np.zeros(0, dtype=int))
+            cols = self.position[cols]
+            self.nodecols.append(cols[cols >= 0])
+        node_rows = np.repeat(np.arange(len(self.nodeclasses)), [len(x) for x in self.nodecols])
+        node_cols = np.concatenate(self.nodecols + [np.zeros(0, dtype=int)])
+        self.A_nodes = coo_matrix((np.ones(len(node_cols)), (node_rows, node_cols)), shape=(len(self.nodeclasses), self.n)).tocsr()
+
+    def column(self, name: str):
+        """model column of the named recipe, or None if it isn't part of this model"""
+        col = Recipes.column(name)
+        if col is None or col >= len(self.position) or self.position[col] < 0:
+            return None
+        return int(self.position[col])
+
+    def recipe(self, i: int) -> Recipe:
+        return self.recipes[self.cols[i]]
+
+    def name(self, i: int) -> str:
+        return self.recipes.name(self.cols[i])
+
+    @property
+    def b_nodes(self) -> np.ndarray:
+        """node and well counts per node class, read from Nodes and Wells so changes to them apply without recompiling"""
+        return np.array([(Wells if building == "Resource Well Pressurizer" else Nodes)[resource][val] for resource, building, val in self.nodeclasses], dtype=float)
+
+    def view(self, target=None, unfueled_APAs=0, fueled_APAs=0, item_offsets=dict(), penalty=0.0, buildlimit=None):
+        return ModelView(self, target, unfueled_APAs, fueled_APAs, item_offsets, penalty, buildlimit)
+
+
+class ModelView:
+    """
+    One LP instance of a CompiledModel. The with_* methods return new views
+    sharing all unchanged arrays with this one.
+    """
+    def __init__(self, model: CompiledModel, target, unfueled_APAs, fueled_APAs, item_offsets, penalty, buildlimit):
+        self.model = model
+        self.target = None
+        self.unfueled_APAs = None
+        self.fueled_APAs = None
+        self.penalty = penalty
+        self.buildlimit = buildlimit
+        self.item_offsets = dict()
+        self.with_apas(unfueled_APAs, fueled_APAs, inplace=True)
+        self.with_offsets(item_offsets, inplace=True)
+        if target is not None:
+            self.with_target(target, inplace=True)
+
+    def _copy(self):
+        new = ModelView.__new__(ModelView)
+        new.__dict__.update(self.__dict__)
+        return new
+
+    def with_apas(self, unfueled_APAs: int, fueled_APAs: int, inplace=False):
+        v = self if inplace else self._copy()
+        m = v.model
+        v.unfueled_APAs = unfueled_APAs
+        v.fueled_APAs = fueled_APAs
+        v.power = m.power.copy()
+        for i in m.powercols:
+            v.power[i] = m.recipe(i).power(unfueled_APAs=unfueled_APAs, fueled_APAs=fueled_APAs)
+        v.b_power = FreePower(unfueled_APAs, fueled_APAs)
+        v.b_sloops = TotalSomersloops - 10 * (unfueled_APAs + fueled_APAs)
+        v._b_eq = None
+        return v
+
+    def with_offsets(self, item_offsets: dict, inplace=False):
+        v = self if inplace else self._copy()
+        v.item_offsets = dict(item_offsets)
+        v._b_eq = None
+        return v
+
+    def with_target(self, target: str, inplace=False):
+        m = self.model
+        if not (target == "AWESOME points" or target in m.itemrows or m.column(target) is not None):
+            raise ValueError("Target not recognized.")
+        v = self if inplace else self._copy()
+        v.target = target
+        if target == "AWESOME points":
+            v.objective = m.points
+        elif target in m.itemrows:
+            v.objective = m.A_items.getrow(m.itemrows[target]).toarray().ravel()
+        else:
+            v.objective = np.zeros(m.n)
+            v.objective[m.column(target)] = -1
+        # the target's own balance row is left out of the equalities
+        if target in m.itemrows:
+            keep = np.ones(len(m.items))
+            keep[m.itemrows[target]] = 0.0
+            v._A_eq = csr_matrix(m.A_items.multiply(keep[:, None]))
+            v._A_eq.eliminate_zeros()
         else:
-            A_ub[i] = Recipes[i].power()
-    b_ub = np.array(FreePower(unfueled_APAs, fueled_APAs))
+            v._A_eq = m.A_items
+        return v
+
+    def with_penalty(self, penalty: float, inplace=False):
+        v = self if inplace else self._copy()
+        v.penalty = penalty
+        return v
+
+    def with_buildlimit(self, buildlimit, inplace=False):
+        v = self if inplace else self._copy()
+        v.buildlimit = buildlimit
+        return v
+
+    @property
+    def c(self):
+        return self.objective + self.penalty
+
+    @property
+    def buildrow(self):
+        """row of the building limit in A_ub, None without one"""
+        if self.buildlimit is None:
+            return None
+        return 1 + len(self.model.nodeclasses)
+
+    @property
+    def slooprow(self):
+        return A_ub_rows(self) - 1
+
+    @property
+    def A_ub(self):
+        m = self.model
+        rows = [csr_matrix(self.power), m.A_nodes]
+        if self.buildlimit is not None:
+            rows.append(csr_matrix(np.ones(m.n)))
+        rows.append(csr_matrix(m.sloops))
+        return vstack(rows, format="csr")
+
+    @property
+    def b_ub(self):
+        parts = [[self.b_power], self.model.b_nodes]
+        if self.buildlimit is not None:
+            parts.append([self.buildlimit])
+        parts.append([self.b_sloops])
+        return np.concatenate(parts)
+
+    @property
+    def A_eq(self):
+        return self._A_eq
+
+    @property
+    def b_eq(self):
+        if self._b_eq is None:
+            m = self.model
+            b_eq = np.zeros(len(m.items))
+            b_eq[m.itemrows["Alien Power Matrix"]] = -5.0 * self.fueled_APAs
+            b_eq[m.itemrows["Water"]] = 999.26898 # 999.26898 m3/min from Water Wells
+            for item in self.item_offsets:
+                b_eq[m.itemrows[item]] += self.item_offsets[item]
+            self._b_eq = b_eq
+        return self._b_eq
+
+
+def A_ub_rows(lp: ModelView) -> int:
+    # power, node classes, building limit, sloops
+    return 2 + len(lp.model.nodeclasses) + (lp.buildlimit is not None)
+
+_compiled = None
+
+def nodeClasses() -> list:
+    """(resource, building, purity or well value) of every node and well class, in row order"""
+    classes = list()
     for resource in ExtractBuildings:
         for building in ExtractBuildings[resource]:
-            if building == "Resource Well Pressurizer":
-                values = Wells[resource]
+            values = Wells[resource] if building == "Resource Well Pressurizer" else Nodes[resource]
+            classes.extend((resource, building, val) for val in values)
+    return classes
+
+def _modelKey() -> tuple:
+    # everything CompiledModel reads from the globals, except the node counts it reads live
+    buildings = tuple((name, b._base, b._exponent, b.sloots) for name, b in Buildings.items())
+    return (len(Recipes), len(Items), MinerMK, BeltMK, PipeMK, PumpsPerPipe, tuple(nodeClasses()), buildings,
+            tuple(MinerBasePower.items()), tuple(BeltCapacity.items()), tuple(PipeCapacity.items()))
+
+def compiled_model() -> CompiledModel:
+    """returns the CompiledModel of the current recipe set, recompiling only if recipes or settings changed."""
+    global _compiled
+    key = _modelKey()
+    if _compiled is None or _compiled[0] != key:
+        _decompositions.clear() # they pin the old model
+        _compiled = (key, CompiledModel())
+    return _compiled[1]
+
+# ----- presolve -----
+class PresolveReport:
+    def __init__(self, rows: int, cols: int):
+        self.rows_before = rows
+        self.cols_before = cols
+        self.rows_after = rows
+        self.cols_after = cols
+        self.forced = 0
+        self.unreachable = 0
+        self.priced_in = 0
+        self.rounds = 0
+
+    def __repr__(self):
+        return ("presolve: " + str(self.rows_before) + " -> " + str(self.rows_after) + " rows, "
+                + str(self.cols_before) + " -> " + str(self.cols_after) + " columns ("
+                + str(self.forced) + " forced to zero, "
+                + str(self.unreachable) + " unreachable, " + str(self.priced_in) + " priced back in over "
+                + str(self.rounds) + " solves)")
+
+last_presolve = None # PresolveReport of the latest solve_sub call
+
+def presolve(lp: ModelView) -> tuple:
+    """
+    Splits the columns of lp into ones that can be dropped for good and ones
+    worth starting the LP with. Returns [candidates, keep, report]:
+    - not candidates: provably zero in every feasible solution (forcing rows).
+      Dominated variants are already left out by CompiledModel.
+    - keep: candidates reachable backwards from the target, from supplied or
+      demanded items and from consumed inequality resources like power.
+    Columns in candidates but not in keep have to be priced out after the solve.
+    """
+    m = lp.model
+    A_eq, b_eq, A_ub, b_ub = lp.A_eq, lp.b_eq, lp.A_ub, lp.b_ub
+    report = PresolveReport(A_eq.shape[0] + A_ub.shape[0], m.n)
+    candidates = np.ones(m.n, dtype=bool)
+    # forcing rows: a balanced item without producers (consumers) forces its consumers (producers) to zero
+    cons = csr_matrix(A_eq > 0, dtype=float)
+    prod = csr_matrix(A_eq < 0, dtype=float)
+    free = b_eq == 0
+    while True:
+        active = candidates.astype(float)
+        np_cons, np_prod = cons @ active, prod @ active
+        forced = free & (np_prod == 0) & (np_cons > 0)
+        forced_p = free & (np_cons == 0) & (np_prod > 0)
+        drop = (cons.T @ forced.astype(float) > 0) | (prod.T @ forced_p.astype(float) > 0)
+        drop &= candidates
+        if not drop.any():
+            break
+        candidates &= ~drop
+        report.forced += int(drop.sum())
+    keep = _reachable(A_eq, b_eq, A_ub, candidates, (lp.objective != 0) & candidates)
+    report.unreachable = int(candidates.sum() - keep.sum())
+    report.cols_after = int(keep.sum())
+    return [candidates, keep, report]
+
+def _reachable(A_eq, b_eq, A_ub, candidates: np.ndarray, seed: np.ndarray) -> np.ndarray:
+    """closure of seed over candidates: add producers of everything the selected columns consume"""
+    A = vstack([A_eq, A_ub], format="csr")
+    cons = csr_matrix(A > 0, dtype=float)
+    prod = csr_matrix(A < 0, dtype=float)
+    nb = len(b_eq)
+    sel = seed.copy()
+    # supplied items have to be consumed, demanded ones produced
+    sel |= (cons[:nb].T @ (b_eq > 0).astype(float) > 0) & candidates
+    sel |= (prod[:nb].T @ (b_eq < 0).astype(float) > 0) & candidates
+    while True:
+        needed = cons @ sel.astype(float) > 0
+        new = (prod.T @ needed.astype(float) > 0) & candidates & ~sel
+        if not new.any():
+            return sel
+        sel |= new
+
+def _linprog_sifted(c, A_ub, b_ub, A_eq, b_eq, candidates: np.ndarray, keep: np.ndarray, report: PresolveReport):
+    """
+    solves the LP on the columns in keep, adding back candidates with negative
+    reduced cost until none are left. The returned x covers all columns.
+    """
+    keep = keep.copy()
+    A_eq_c, A_ub_c = A_eq.tocsc(), A_ub.tocsc()
+    scale = max(1.0, np.abs(c).max())
+    while True:
+        report.rounds += 1
+        cols = np.flatnonzero(keep)
+        sub_eq, sub_ub = A_eq_c[:, cols].tocsr(), A_ub_c[:, cols].tocsr()
+        # item and resource rows no kept recipe touches
+        rows_eq = (np.diff(sub_eq.indptr) > 0) | (b_eq != 0)
+        rows_ub = (np.diff(sub_ub.indptr) > 0) | (b_ub < 0)
+        report.rows_after = int(rows_eq.sum() + rows_ub.sum())
+        report.cols_after = len(cols)
+        res = _linprog(c[cols], sub_ub[rows_ub], b_ub[rows_ub], sub_eq[rows_eq], b_eq[rows_eq])
+        if res.status == 2 and (keep != candidates).any():
+            # infeasible, e.g. byproducts that nothing kept can dispose of. widen by one layer.
+            touched = ((abs(sub_eq) @ np.ones(len(cols)) > 0) | (b_eq != 0)).astype(float)
+            keep |= (abs(A_eq_c).T @ touched > 0) & candidates
+            keep = _reachable(A_eq, b_eq, A_ub, candidates, keep)
+            continue
+        if res.status != 0:
+            break
+        y = np.zeros(len(b_eq))
+        y[rows_eq] = res.eqlin.marginals
+        z = np.zeros(len(b_ub))
+        z[rows_ub] = res.ineqlin.marginals
+        reduced = c - A_eq_c.T @ y - A_ub_c.T @ z
+        enter = candidates & ~keep & (reduced < -1e-9 * scale)
+        if not enter.any():
+            break
+        keep |= enter
+        report.priced_in += int(enter.sum())
+    x = np.zeros(len(c))
+    if res.status == 0:
+        x[cols] = res.x
+    return OptimizeResult(x=x, fun=res.fun, status=res.status, success=res.success, message=res.message, cols=cols)
+
+# ----- column generation -----
+class ColumnGeneration:
+    """
+    Restricted master LP over the columns of lp. With extraction=True the
+    ExtractRecipe grid is replaced by a few clocks per node class, with
+    sloops=True the SloopRecipe variants are left out entirely. solve() then
+    adds the clock with the most negative reduced cost per node class and per
+    sloopable recipe, found in closed form from the item, power, node and
+    sloop row duals, until no negative reduced costs are left.
+    Generated recipes are not registered, RecipesByName resolves their names.
+    """
+    def __init__(self, lp: ModelView, extraction=True, sloops=False):
+        self.lp = lp
+        m = lp.model
+        replaced = np.zeros(m.n, dtype=bool)
+        if extraction:
+            for cols in m.nodecols:
+                replaced[cols] = True
+        if sloops:
+            replaced |= m.sloops > 0
+        self.base = np.flatnonzero(~replaced) # model columns kept as they are
+        self.extraction = extraction
+        self.sloops = sloops
+        self.gen_class = list() # node class index
+        self.gen_clock = list()
+        self.gen_recipe = list() # model column of the sloop variant's base recipe
+        self.gen_sloops = list()
+        self.gen_sloopclock = list()
+        self.rounds = 0
+        if extraction:
+            for k in range(len(m.nodeclasses)):
+                resource, building, val = m.nodeclasses[k]
+                for clock in np.linspace(0.01, maxExtractClock(resource, building, val), ColGenInitialClocks):
+                    self.gen_class.append(k)
+                    self.gen_clock.append(clock)
+        if sloops:
+            sloopable = [i for i in range(m.n) if type(m.recipe(i)) == Recipe and m.recipe(i).building.sloots > 0]
+            self._sloopable = np.array(sloopable, dtype=int)
+            # input and output rates at 100% clock, items x sloopable recipes
+            In = m.A_items[:, self._sloopable].maximum(0)
+            Out = -m.A_items[:, self._sloopable].minimum(0)
+            self._in, self._out = In.tocsc(), Out.tocsc()
+            self._slots = np.array([m.recipe(i).building.sloots for i in sloopable], dtype=float)
+            self._basepower = np.array([m.recipe(i).building._base for i in sloopable], dtype=float)
+            self._exponent = np.array([m.recipe(i).building._exponent for i in sloopable], dtype=float)
+
+    def _extract_columns(self) -> tuple:
+        """objective, A_ub and A_eq columns of the generated ExtractRecipes"""
+        lp, m = self.lp, self.lp.model
+        k = len(self.gen_class)
+        cls = np.array(self.gen_class, dtype=int)
+        clocks = np.array(self.gen_clock, dtype=float)
+        rates, power = np.zeros(k), np.zeros(k)
+        itemrows = np.zeros(k, dtype=int)
+        for j in range(k):
+            resource, building, val = m.nodeclasses[cls[j]]
+            r, p = extractCoefficients(building, val, clocks[j:j+1])
+            rates[j], power[j] = r[0], p[0]
+            itemrows[j] = m.itemrows[resource]
+        c = np.full(k, float(lp.penalty))
+        istarget = itemrows == m.itemrows.get(lp.target, -1)
+        c[istarget] += rates[istarget]
+        A_eq = coo_matrix((rates[~istarget], (itemrows[~istarget], np.flatnonzero(~istarget))), shape=(len(m.items), k))
+        ub_rows = [np.zeros(k, dtype=int), 1 + cls]
+        ub_vals = [power, np.ones(k)]
+        if lp.buildrow is not None:
+            ub_rows.append(np.full(k, lp.buildrow))
+            ub_vals.append(np.ones(k))
+        A_ub = coo_matrix((np.concatenate(ub_vals), (np.concatenate(ub_rows), np.tile(np.arange(k), len(ub_rows)))), shape=(A_ub_rows(lp), k))
+        return c, A_ub, A_eq
+
+    def _sloop_columns(self) -> tuple:
+        """objective, A_ub and A_eq columns of the generated SloopRecipes"""
+        lp, m = self.lp, self.lp.model
+        k = len(self.gen_recipe)
+        cols = np.array(self.gen_recipe, dtype=int)
+        sloops = np.array(self.gen_sloops, dtype=float)
+        clocks = np.array(self.gen_sloopclock, dtype=float)
+        power = np.zeros(k)
+        eq_rows, eq_cols, eq_vals = list(), list(), list()
+        for basecol in np.unique(cols):
+            idx = np.flatnonzero(cols == basecol)
+            rates, power[idx] = sloopCoefficients(m.recipe(basecol), sloops[idx], clocks[idx])
+            for item in rates:
+                eq_rows.append(np.full(len(idx), m.itemrows[item]))
+                eq_cols.append(idx)
+                eq_vals.append(rates[item])
+        eq_rows = np.concatenate(eq_rows + [np.zeros(0, dtype=int)])
+        eq_cols = np.concatenate(eq_cols + [np.zeros(0, dtype=int)])
+        eq_vals = np.concatenate(eq_vals + [np.zeros(0)])
+        A_eq = coo_matrix((eq_vals, (eq_rows, eq_cols)), shape=(len(m.items), k)).tocsr()
+        c = np.full(k, float(lp.penalty))
+        if lp.target in m.itemrows:
+            row = m.itemrows[lp.target]
+            c += A_eq[row].toarray().ravel()
+            A_eq = csr_matrix(A_eq.multiply((np.arange(len(m.items)) != row)[:, None]))
+        ub_rows = [np.zeros(k, dtype=int), np.full(k, lp.slooprow)]
+        ub_vals = [power, sloops]
+        if lp.buildrow is not None:
+            ub_rows.append(np.full(k, lp.buildrow))
+            ub_vals.append(np.ones(k))
+        A_ub = coo_matrix((np.concatenate(ub_vals), (np.concatenate(ub_rows), np.tile(np.arange(k), len(ub_rows)))), shape=(A_ub_rows(lp), k))
+        return c, A_ub, A_eq
+
+    def matrices(self) -> tuple:
+        lp = self.lp
+        c, A_ub, A_eq = [lp.c[self.base]], [lp.A_ub[:, self.base]], [lp.A_eq[:, self.base]]
+        for block in (self._extract_columns(), self._sloop_columns()):
+            c.append(block[0])
+            A_ub.append(block[1])
+            A_eq.append(block[2])
+        return np.concatenate(c), hstack(A_ub, format="csr"), hstack(A_eq, format="csr")
+
+    def _constant(self, z: np.ndarray) -> float:
+        # reduced cost share of the penalty and the building limit
+        const = self.lp.penalty
+        if self.lp.buildrow is not None:
+            const -= z[self.lp.buildrow]
+        return const
+
+    def price_extraction(self, y: np.ndarray, z: np.ndarray) -> list:
+        """[node class index, clock, reduced cost] of the best clock of every node class"""
+        lp, m = self.lp, self.lp.model
+        e = ProcPowerExponent
+        res = list()
+        for k in range(len(m.nodeclasses)):
+            resource, building, val = m.nodeclasses[k]
+            R, P, _ = extractBase(building, val)
+            cmax = maxExtractClock(resource, building, val)
+            # reduced cost g*c + h*c**e + const of the clock c
+            if resource == lp.target:
+                g = -R
             else:
-                values = Nodes[resource]
-            for val in values:
-                row = np.zeros(len(Recipes))
-                for i in range(len(Recipes)):
-                    if type(Recipes[i]) == ExtractRecipe:
-                        rec = Recipes[i]
-                        if rec.building == building and rec.resource == resource and rec.val == val:
-                            row[i] = 1
-                A_ub = np.vstack([A_ub, row])
-                b_ub = np.append(b_ub, values[val])
-    if buildlimit is not None:
-        A_ub = np.vstack([A_ub, np.ones(len(Recipes))])
-        b_ub = np.append(b_ub, buildlimit)
-    # sloops
-    sloopline = np.zeros(len(Recipes))
-    for i in range(len(Recipes)):
-        if type(Recipes[i]) == SloopRecipe:
-            sloopline[i] = Recipes[i].sloops
-    A_ub = np.vstack([A_ub, sloopline])
-    b_ub = np.append(b_ub, TotalSomersloops - 10 * (unfueled_APAs + fueled_APAs))
-    # equalities: in=out for all registered items except target
-    A_eq = np.zeros((len(Items),len(Recipes)))
-    b_eq = np.zeros(len(Items))
-    b_eq[Items.index("Alien Power Matrix")] = -5.0 * fueled_APAs
-    b_eq[Items.index("Water")] = 999.26898 # 999.26898 m3/min from Water Wells
-    for item in item_offsets:
-        b_eq[Items.index(item)] += item_offsets[item]
-    for i in range(len(Recipes)):
-        rec = Recipes[i]
-        for item in rec.inputs.keys() | rec.outputs.keys():
-            if item not in (target, "AWESOME points"):
-                A_eq[Items.index(item),i] = rec.rate(item)
-    # idx = 0
-    # while idx < A_eq.shape[0]:
-    #     if A_eq[idx].sum() == 0:
-    #         A_eq = np.delete(A_eq, idx, 0)
-    #         b_eq = np.delete(b_eq, idx)
-    #     idx += 1
-    # solve
-    for met in ('revised simplex', 'highs-ds', 'highs', 'simplex', 'highs-ipm', 'interior-point'):
-        solver_method = met
-        res = linprog(c, A_ub, b_ub, A_eq, b_eq, method=solver_method, options=solver_options)
-        if res.success:
-            #print("solver method used 1st:",solver_method)
+                g = R * y[m.itemrows[resource]]
+            h = -z[0] * P
+            const = self._constant(z) - z[1 + k]
+            clock = _argmin_clock(g, h, e, 0.01, cmax)
+            res.append([k, clock, g * clock + h * clock**e + const])
+        return res
+
+    def price_sloops(self, y: np.ndarray, z: np.ndarray) -> list:
+        """[model column of the base recipe, sloops, clock, reduced cost] of the best variant of every sloopable recipe"""
+        lp, m = self.lp, self.lp.model
+        w = y.copy()
+        if lp.target in m.itemrows:
+            w[m.itemrows[lp.target]] = -1.0
+        win, wout = self._in.T @ w, self._out.T @ w
+        best = [None] * len(self._sloopable)
+        for s in range(1, int(self._slots.max()) + 1):
+            j = np.flatnonzero(self._slots >= s)
+            boost = 1 + s / self._slots[j]
+            # reduced cost g*c + h*c**e + const of the clock c in [1, 2.5]
+            g = -win[j] + boost * wout[j]
+            h = -z[0] * self._basepower[j] * boost**2
+            const = self._constant(z) - z[lp.slooprow] * s
+            for i in range(len(j)):
+                e = self._exponent[j[i]]
+                clock = _argmin_clock(g[i], h[i], e, 1.0, 2.5)
+                d = g[i] * clock + h[i] * clock**e + const
+                if best[j[i]] is None or d < best[j[i]][3]:
+                    best[j[i]] = [int(self._sloopable[j[i]]), s, clock, d]
+        return best
+
+    def solve(self, maxrounds=100):
+        b_ub, b_eq = self.lp.b_ub, self.lp.b_eq
+        while True:
+            self.rounds += 1
+            c, A_ub, A_eq = self.matrices()
+            res = _linprog(c, A_ub, b_ub, A_eq, b_eq)
+            if res.status != 0 or self.rounds >= maxrounds:
+                return res
+            y, z = res.eqlin.marginals, res.ineqlin.marginals
+            tol = -1e-9 * max(1.0, np.abs(c).max())
+            added = False
+            if self.extraction:
+                for k, clock, d in self.price_extraction(y, z):
+                    if d < tol and not _known(clock, [self.gen_clock[j] for j in range(len(self.gen_class)) if self.gen_class[j] == k]):
+                        self.gen_class.append(k)
+                        self.gen_clock.append(clock)
+                        added = True
+            if self.sloops:
+                for basecol, sloops, clock, d in self.price_sloops(y, z):
+                    known = [self.gen_sloopclock[j] for j in range(len(self.gen_recipe)) if self.gen_recipe[j] == basecol and self.gen_sloops[j] == sloops]
+                    if d < tol and not _known(clock, known):
+                        self.gen_recipe.append(basecol)
+                        self.gen_sloops.append(sloops)
+                        self.gen_sloopclock.append(clock)
+                        added = True
+            if not added:
+                self.A = (c, A_ub, A_eq)
+                return res
+
+    def recipe(self, i: int) -> Recipe:
+        if i < len(self.base):
+            return self.lp.model.recipe(self.base[i])
+        i -= len(self.base)
+        if i < len(self.gen_class):
+            resource, building, val = self.lp.model.nodeclasses[self.gen_class[i]]
+            return ExtractRecipe(building, resource, val, self.gen_clock[i])
+        i -= len(self.gen_class)
+        return SloopRecipe(self.lp.model.recipe(self.gen_recipe[i]), self.gen_sloops[i], self.gen_sloopclock[i])
+
+    def name(self, i: int) -> str:
+        """generated recipes stay unregistered, RecipesByName resolves their names"""
+        if i < len(self.base):
+            return self.lp.model.name(self.base[i])
+        return self.recipe(i).name
+
+def _argmin_clock(g: float, h: float, e: float, lo: float, hi: float) -> float:
+    """minimiser of g*c + h*c**e over lo <= c <= hi, for h >= 0 and e > 1"""
+    if g >= 0:
+        return lo
+    elif h <= 0:
+        return hi
+    return min(hi, max(lo, (-g / (h * e))**(1 / (e - 1))))
+
+def _known(clock: float, clocks: list) -> bool:
+    return any(abs(x - clock) < 1e-9 for x in clocks)
+
+# ----- outer approximation -----
+class OuterApproximation:
+    """
+    lp with the ExtractRecipe grid replaced by three continuous columns per
+    node class: nodes used n, clock sum y (n times the clock, bounded by
+    0.01 n and the max clock times n) and power P. Extraction power
+    n*base*(y/n)**ProcPowerExponent is convex in (n, y), so it is bounded
+    from below by its tangent planes, one A_ub row per cut clock c:
+    base*((1-e)*c**e*n + e*c**(e-1)*y) - P <= 0. solve() re-solves, adding
+    the cut at each class's current clock, until the cuts are within
+    OATolerance of the curve.
+    """
+    def __init__(self, lp: ModelView):
+        self.lp = lp
+        m = lp.model
+        replaced = np.zeros(m.n, dtype=bool)
+        for cols in m.nodecols:
+            replaced[cols] = True
+        self.base = np.flatnonzero(~replaced) # model columns kept as they are
+        self.K = len(m.nodeclasses)
+        info = [extractBase(building, val)[:2] + (maxExtractClock(resource, building, val),) for resource, building, val in m.nodeclasses]
+        self.rate, self.power, self.cmax = (np.array([x[k] for x in info]) for k in range(3))
+        self.cut_class = list()
+        self.cut_clock = list()
+        for k in range(self.K):
+            for clock in np.linspace(0.01, self.cmax[k], ColGenInitialClocks):
+                self.cut_class.append(k)
+                self.cut_clock.append(clock)
+        self.rounds = 0
+
+    def columns(self, k: int) -> tuple:
+        """columns of node class k's n, y and P"""
+        first = len(self.base) + 3 * k
+        return first, first + 1, first + 2
+
+    def matrices(self) -> tuple:
+        """c, A_ub, b_ub, A_eq and b_eq: lp's rows, then the clock bounds, then the cuts"""
+        lp, m, K = self.lp, self.lp.model, self.K
+        nb = len(self.base)
+        ncol, ycol, pcol = nb + 3 * np.arange(K), nb + 3 * np.arange(K) + 1, nb + 3 * np.arange(K) + 2
+        rows = A_ub_rows(lp)
+        c = np.concatenate([lp.c[self.base], np.zeros(3 * K)])
+        c[ncol] = lp.penalty
+        itemrows = np.array([m.itemrows[resource] for resource, _, _ in m.nodeclasses])
+        istarget = itemrows == m.itemrows.get(lp.target, -1)
+        c[ycol[istarget]] -= self.rate[istarget]
+        A_eq = hstack([lp.A_eq[:, self.base], coo_matrix((-self.rate[~istarget], (itemrows[~istarget], ycol[~istarget] - nb)), shape=(len(m.items), 3 * K))], format="csr")
+        ub_rows = [np.zeros(K, dtype=int), 1 + np.arange(K)]
+        ub_cols = [pcol, ncol]
+        if lp.buildrow is not None:
+            ub_rows.append(np.full(K, lp.buildrow))
+            ub_cols.append(ncol)
+        # 0.01 n <= y <= cmax n
+        ub_rows += [rows + np.arange(K)] * 2 + [rows + K + np.arange(K)] * 2
+        ub_cols += [ycol, ncol, ncol, ycol]
+        ub_vals = [np.ones(K)] * (len(ub_rows) - 4) + [np.ones(K), -self.cmax, np.full(K, 0.01), -np.ones(K)]
+        e = ProcPowerExponent
+        cls, clock = np.array(self.cut_class, dtype=int), np.array(self.cut_clock)
+        cuts = rows + 2 * K + np.arange(len(cls))
+        ub_rows += [cuts] * 3
+        ub_cols += [ncol[cls], ycol[cls], pcol[cls]]
+        ub_vals += [self.power[cls] * (1 - e) * clock**e, self.power[cls] * e * clock**(e - 1), -np.ones(len(cls))]
+        new = coo_matrix((np.concatenate(ub_vals), (np.concatenate(ub_rows), np.concatenate(ub_cols) - nb)), shape=(rows + 2 * K + len(cls), 3 * K))
+        A_ub = hstack([vstack([lp.A_ub[:, self.base], csr_matrix((2 * K + len(cls), nb))]), new], format="csr")
+        b_ub = np.concatenate([lp.b_ub, np.zeros(2 * K + len(cls))])
+        return c, A_ub, b_ub, A_eq, lp.b_eq
+
+    def objective(self, name, c, A_ub) -> np.ndarray:
+        """
+        lexObjective, with "buildings" counting only recipes and the nodes
+        used, and "power" and "sloops" taken from lp's rows, since the clock
+        bounds and cuts follow them in A_ub
+        """
+        if name == "buildings":
+            return self.counted().astype(float)
+        if name == "power":
+            return A_ub.getrow(0).toarray().ravel()
+        if name == "sloops":
+            return A_ub.getrow(self.lp.slooprow).toarray().ravel()
+        return lexObjective(name, c, A_ub)
+
+    def counted(self) -> np.ndarray:
+        """columns that are recipe multiplicities: the base recipes and each class's n"""
+        mask = np.zeros(len(self.base) + 3 * self.K, dtype=bool)
+        mask[:len(self.base)] = True
+        mask[len(self.base)::3] = True
+        return mask
+
+    def clocks(self, x: np.ndarray) -> tuple:
+        """nodes used and clock per node class"""
+        nodes = x[len(self.base)::3]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            clock = np.clip(np.where(nodes > 1e-9, x[len(self.base)+1::3] / nodes, 0.01), 0.01, self.cmax)
+        return nodes, clock
+
+    def cut(self, k: int, clock: float) -> np.ndarray:
+        """A_ub row of node class k's tangent cut at clock"""
+        e = ProcPowerExponent
+        n, y, P = self.columns(k)
+        row = np.zeros(len(self.base) + 3 * self.K)
+        row[n], row[y], row[P] = self.power[k] * (1 - e) * clock**e, self.power[k] * e * clock**(e - 1), -1.0
+        return row
+
+    def solve(self, objectives=("target",), maxrounds=100) -> OptimizeResult:
+        """
+        lexicographic() over objectives, adding cuts at the final x until
+        none is violated. Cuts are first settled on the first objective
+        alone, with highspy on one resident model that takes the new cuts
+        as rows and re-solves warm; the later stages rarely need many more.
+        """
+        stages = 1
+        model = HighsLP(*self.matrices()) if _resident() else None
+        while True:
+            self.rounds += 1
+            if model is not None:
+                res = model.solve()
+                if res.status != 0:
+                    model = None # reported by lexicographic below
+                    continue
+            else:
+                c, A_ub, b_ub, A_eq, b_eq = self.matrices()
+                res = lexicographic([self.objective(o, c, A_ub) for o in objectives[:stages]], A_ub, b_ub, A_eq, b_eq)
+                if res.status != 0 or self.rounds >= maxrounds:
+                    return res
+            nodes, clock = self.clocks(res.x)
+            exact = nodes * self.power * clock**ProcPowerExponent
+            added = False
+            for k in np.flatnonzero(exact - res.x[len(self.base)+2::3] > OATolerance * np.maximum(1.0, exact)):
+                if not _known(clock[k], [self.cut_clock[j] for j in range(len(self.cut_class)) if self.cut_class[j] == k]):
+                    self.cut_class.append(int(k))
+                    self.cut_clock.append(float(clock[k]))
+                    if model is not None:
+                        model.add_row(self.cut(k, clock[k]), -highspy.kHighsInf, 0.0)
+                    added = True
+            if model is not None and (not added or self.rounds >= maxrounds):
+                model = None
+                stages = len(objectives)
+            elif not added and stages < len(objectives):
+                stages = len(objectives)
+            elif not added:
+                self.A = (c, A_ub, b_ub, A_eq, b_eq)
+                return res
+
+    def plan(self, x: np.ndarray) -> dict:
+        """recipe name -> multiplicity, node classes as ExtractRecipes at their clock"""
+        m = self.lp.model
+        recps = dict()
+        for i in np.flatnonzero(x[:len(self.base)] > 10**(-9)):
+            if type(m.recipe(self.base[i])) != MilestoneRecipe:
+                recps[m.name(self.base[i])] = x[i]
+        nodes, clock = self.clocks(x)
+        for k in np.flatnonzero(nodes > 10**(-9)):
+            resource, building, val = m.nodeclasses[k]
+            name = extractPrefix(building, resource, val) + clockSuffix(clock[k])
+            recps[name] = recps.get(name, 0.0) + nodes[k]
+        return dict((x,recps[x]) for x in sorted(recps))
+
+# ----- solver backends -----
+solver_log = deque(maxlen=1000) # (backend, method, status, iterations, seconds, rows, columns) per LP solved, through _linprog or a resident HighsLP
+
+class LPBackend:
+    """
+    solves min c @ x s.t. A_ub x <= b_ub, A_eq x = b_eq, x >= 0. solve()
+    returns an OptimizeResult like linprog's, with marginals, plus the
+    method that produced it, its iteration count and wall time, and logs
+    them to solver_log.
+    """
+    name = None
+
+    def solve(self, c, A_ub, b_ub, A_eq, b_eq) -> OptimizeResult:
+        start = time.perf_counter()
+        res = self._solve(c, A_ub, b_ub, A_eq, b_eq)
+        res.time = time.perf_counter() - start
+        res.backend = self.name
+        solver_log.append((self.name, res.method, res.status, res.nit, res.time, A_ub.shape[0] + A_eq.shape[0], len(c)))
+        return res
+
+    def _solve(self, c, A_ub, b_ub, A_eq, b_eq) -> OptimizeResult:
+        raise NotImplementedError
+
+
+class LinprogBackend(LPBackend):
+    """scipy.optimize.linprog, trying solver_methods in order"""
+    name = "linprog"
+
+    def _solve(self, c, A_ub, b_ub, A_eq, b_eq):
+        for met in solver_methods:
+            res = linprog(c, A_ub, b_ub, A_eq, b_eq, method=met, options=solver_options)
+            if res.success:
+                break
+        res.method = met
+        return res
+
+
+class HighsBackend(LPBackend):
+    """
+    highspy directly. The last model stays resident: called again with
+    constraint matrices of the same shape and sparsity pattern, as every
+    re-solve of a ModelView builds, only the changed coefficients, costs and
+    right-hand sides are updated and HiGHS restarts from the previous basis.
+    """
+    name = "highspy"
+
+    def __init__(self):
+        self._lp = None
+        self._A = None
+
+    def _solve(self, c, A_ub, b_ub, A_eq, b_eq):
+        A = vstack([A_ub, A_eq], format="csr")
+        A.sort_indices()
+        old = self._A
+        if self._lp is None or old.shape != A.shape or self._lp.n_ub != A_ub.shape[0] or not (np.array_equal(old.indptr, A.indptr) and np.array_equal(old.indices, A.indices)):
+            self._lp = HighsLP(c, A_ub, b_ub, A_eq, b_eq)
+        else:
+            changed = np.flatnonzero(old.data != A.data)
+            rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))[changed]
+            for i, j, v in zip(rows, A.indices[changed], A.data[changed]):
+                self._lp.h.changeCoeff(int(i), int(j), float(v))
+            self._lp.set_c(c)
+            self._lp.set_b_ub(np.asarray(b_ub, dtype=float))
+            self._lp.set_b_eq(np.asarray(b_eq, dtype=float))
+        self._A = A
+        res = self._lp.solve(log=False)
+        res.method = "simplex"
+        return res
+
+
+class NumpyBackend(LPBackend):
+    """
+    dense two-phase tableau simplex with Bland's rule in plain NumPy. Slow,
+    meant as a reference to check the other backends on small models.
+    """
+    name = "numpy"
+    maxiter = 100000
+
+    def _solve(self, c, A_ub, b_ub, A_eq, b_eq):
+        A_ub = A_ub.toarray() if hasattr(A_ub, "toarray") else np.asarray(A_ub, dtype=float)
+        A_eq = A_eq.toarray() if hasattr(A_eq, "toarray") else np.asarray(A_eq, dtype=float)
+        m_ub, m_eq, n = A_ub.shape[0], A_eq.shape[0], len(c)
+        m = m_ub + m_eq
+        N = n + m_ub # structural and slack columns, artificials after
+        sign = np.where(np.concatenate([b_ub, b_eq]) < 0, -1.0, 1.0)
+        T = np.zeros((m, N + m))
+        T[:m_ub, :n] = A_ub
+        T[:m_ub, n:N] = np.eye(m_ub)
+        T[m_ub:, :n] = A_eq
+        T *= sign[:, None]
+        T[:, N:] = np.eye(m)
+        rhs = sign * np.concatenate([b_ub, b_eq])
+        basis = np.arange(N, N + m)
+        scale = max(1.0, np.abs(T).max())
+        eps = 1e-9 * scale
+        # phase 1: minimize the artificials
+        cost = np.concatenate([np.zeros(N), np.ones(m)])
+        status, nit = self._iterate(T, rhs, basis, cost, np.ones(N + m, dtype=bool), eps, 0)
+        if cost[basis] @ rhs > 1e-7 * max(1.0, np.abs(rhs).max()):
+            return OptimizeResult(x=None, fun=None, status=2, success=False, message="infeasible", nit=nit, method="tableau simplex")
+        # pivot remaining artificials out where a row still has a structural entry
+        for r in np.flatnonzero(basis >= N):
+            j = np.flatnonzero(np.abs(T[r, :N]) > eps)
+            if len(j):
+                self._pivot(T, rhs, basis, r, j[0])
+        # phase 2
+        cost = np.concatenate([np.asarray(c, dtype=float), np.zeros(m_ub + m)])
+        allowed = np.arange(N + m) < N
+        status, nit = self._iterate(T, rhs, basis, cost, allowed, eps, nit)
+        if status != 0:
+            message = "unbounded" if status == 3 else "iteration limit"
+            return OptimizeResult(x=None, fun=None, status=status, success=False, message=message, nit=nit, method="tableau simplex")
+        xfull = np.zeros(N + m)
+        xfull[basis] = rhs
+        x = xfull[:n]
+        y = (cost[basis] @ T[:, N:]) * sign # B^-1 sits where the artificial identity started
+        return OptimizeResult(x=x, fun=float(np.dot(c, x)), status=0, success=True, message="optimal", nit=nit, method="tableau simplex",
+                              ineqlin=OptimizeResult(marginals=y[:m_ub], residual=b_ub - A_ub @ x),
+                              eqlin=OptimizeResult(marginals=y[m_ub:], residual=b_eq - A_eq @ x))
+
+    @staticmethod
+    def _pivot(T, rhs, basis, r, j):
+        p = T[r, j]
+        T[r] /= p
+        rhs[r] /= p
+        col = T[:, j].copy()
+        col[r] = 0.0
+        T -= np.outer(col, T[r])
+        rhs -= col * rhs[r]
+        basis[r] = j
+
+    def _iterate(self, T, rhs, basis, cost, allowed, eps, nit) -> tuple:
+        while nit < self.maxiter:
+            reduced = cost - cost[basis] @ T
+            enter = np.flatnonzero(allowed & (reduced < -eps))
+            if len(enter) == 0:
+                return 0, nit
+            j = enter[0]
+            rows = np.flatnonzero(T[:, j] > eps)
+            if len(rows) == 0:
+                return 3, nit
+            ratios = rhs[rows] / T[rows, j]
+            best = rows[ratios <= ratios.min() + eps]
+            r = best[np.argmin(basis[best])]
+            self._pivot(T, rhs, basis, r, j)
+            nit += 1
+        return 1, nit
+
+
+Backends = {"linprog": LinprogBackend, "highspy": HighsBackend, "numpy": NumpyBackend}
+_backends = dict()
+
+def backend(name=None) -> LPBackend:
+    """the LPBackend called name, SolverBackend by default ("auto" is linprog). instances are reused so resident models persist"""
+    if name is None:
+        name = SolverBackend
+    if name == "auto":
+        name = "linprog"
+    if name not in Backends:
+        raise ValueError("Unknown solver backend: "+str(name))
+    if name == "highspy" and highspy is None:
+        raise ImportError("The highspy backend requires highspy")
+    if name not in _backends:
+        _backends[name] = Backends[name]()
+    return _backends[name]
+
+def _linprog(c, A_ub, b_ub, A_eq, b_eq):
+    return backend().solve(c, A_ub, b_ub, A_eq, b_eq)
+
+def _resident() -> bool:
+    """
+    whether solves may keep HighsLP models resident: SolverBackend "auto"
+    or "highspy" with highspy installed. Otherwise those paths go through
+    _linprog. sensitivity, parametric, solve_exact, pareto and the integer
+    sloop MILP need HiGHS itself and always use it.
+    """
+    return highspy is not None and SolverBackend in ("auto", "highspy")
+
+# ----- resident HiGHS models -----
+class HighsLP:
+    """
+    LP kept resident in a highspy.Highs instance, with rows A_ub x <= b_ub
+    followed by A_eq x = b_eq. After costs, right-hand sides or coefficients
+    are changed, solve() restarts from the previous optimal basis with the
+    dual simplex instead of solving from scratch.
+    """
+    def __init__(self, c, A_ub, b_ub, A_eq, b_eq):
+        if highspy is None:
+            raise ImportError("HighsLP requires highspy")
+        A = vstack([A_ub, A_eq], format="csc")
+        A.sort_indices()
+        inf = highspy.kHighsInf
+        lp = highspy.HighsLp()
+        lp.num_col_ = A.shape[1]
+        lp.num_row_ = A.shape[0]
+        lp.col_cost_ = np.asarray(c, dtype=float)
+        lp.col_lower_ = np.zeros(A.shape[1])
+        lp.col_upper_ = np.full(A.shape[1], inf)
+        lp.row_lower_ = np.concatenate([np.full(len(b_ub), -inf), b_eq])
+        lp.row_upper_ = np.concatenate([b_ub, b_eq])
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+        self.h = highspy.Highs()
+        self.h.silent()
+        self.h.passModel(lp)
+        self.n = A.shape[1]
+        self.n_ub = len(b_ub)
+        self.b_ub = np.array(b_ub, dtype=float)
+        self.b_eq = np.array(b_eq, dtype=float)
+        self.free = set() # A_eq rows currently without bounds
+
+    def set_b_ub(self, b_ub):
+        for i in np.flatnonzero(b_ub != self.b_ub):
+            self.h.changeRowBounds(int(i), -highspy.kHighsInf, float(b_ub[i]))
+        self.b_ub = np.array(b_ub, dtype=float)
+
+    def set_b_eq(self, b_eq):
+        for i in np.flatnonzero(b_eq != self.b_eq):
+            if i not in self.free:
+                self.h.changeRowBounds(int(self.n_ub + i), float(b_eq[i]), float(b_eq[i]))
+        self.b_eq = np.array(b_eq, dtype=float)
+
+    def free_row(self, row: int, free=True):
+        """drops the bounds of A_eq row `row`, or restores them with free=False"""
+        if free:
+            self.free.add(row)
+            self.h.changeRowBounds(int(self.n_ub + row), -highspy.kHighsInf, highspy.kHighsInf)
+        else:
+            self.free.discard(row)
+            self.h.changeRowBounds(int(self.n_ub + row), float(self.b_eq[row]), float(self.b_eq[row]))
+
+    def set_rhs(self, row: int, value: float):
+        """right-hand side of one row, A_ub rows first then A_eq rows"""
+        if row < self.n_ub:
+            self.h.changeRowBounds(int(row), -highspy.kHighsInf, float(value))
+            self.b_ub[row] = value
+        else:
+            self.h.changeRowBounds(int(row), float(value), float(value))
+            self.b_eq[row - self.n_ub] = value
+
+    def set_bounds(self, cols, lower, upper):
+        cols = np.asarray(cols, dtype=np.int32)
+        self.h.changeColsBounds(len(cols), cols, np.asarray(lower, dtype=float), np.asarray(upper, dtype=float))
+
+    def set_integer(self, cols):
+        cols = np.asarray(cols, dtype=np.int32)
+        self.h.changeColsIntegrality(len(cols), cols, np.full(len(cols), 1, dtype=np.uint8))
+
+    def set_coeffs(self, row: int, cols, vals):
+        """changes entries of A_ub row `row`"""
+        for j, v in zip(cols, vals):
+            self.h.changeCoeff(int(row), int(j), float(v))
+
+    def set_c(self, c):
+        self.h.changeColsCost(self.n, np.arange(self.n, dtype=np.int32), np.asarray(c, dtype=float))
+
+    def add_row(self, coeffs, lower: float, upper: float):
+        """appends lower <= coeffs @ x <= upper. the current basis stays valid with the new row basic"""
+        coeffs = np.asarray(coeffs, dtype=float)
+        idx = np.flatnonzero(coeffs)
+        self.h.addRow(float(lower), float(upper), len(idx), idx.astype(np.int32), coeffs[idx])
+
+    def solve(self, log=True) -> OptimizeResult:
+        """re-solves, logged to solver_log as backend "highspy (resident)" unless log=False"""
+        start = time.perf_counter()
+        self.h.run()
+        status = self.h.getModelStatus()
+        info = self.h.getInfo()
+        if status == highspy.HighsModelStatus.kOptimal:
+            code = 0
+        elif status == highspy.HighsModelStatus.kInfeasible:
+            code = 2
+        elif status in (highspy.HighsModelStatus.kUnbounded, highspy.HighsModelStatus.kUnboundedOrInfeasible):
+            code = 3
+        else:
+            code = 4
+        res = OptimizeResult(status=code, success=code == 0, message=self.h.modelStatusToString(status), nit=info.simplex_iteration_count)
+        if code == 0:
+            sol = self.h.getSolution()
+            dual = np.array(sol.row_dual)
+            res.x = np.array(sol.col_value)
+            res.fun = info.objective_function_value
+            res.ineqlin = OptimizeResult(marginals=dual[:self.n_ub])
+            res.eqlin = OptimizeResult(marginals=dual[self.n_ub:])
+        if log:
+            res.time = time.perf_counter() - start
+            solver_log.append(("highspy (resident)", "dual simplex", code, res.nit, res.time, self.h.getNumRow(), self.n))
+        return res
+
+
+last_lexicographic = None # per stage objective value, tolerance and status of the latest solve_sub call
+
+def lexObjective(name, c, A_ub) -> np.ndarray:
+    """
+    objective vector for a lexicographic stage: "target" (c), "buildings"
+    (total recipe multiplicity), "power" (net power, row 0 of A_ub),
+    "sloops" (the last row of A_ub), or an explicit array.
+    """
+    if not isinstance(name, str):
+        return np.asarray(name, dtype=float)
+    if name == "target":
+        return np.asarray(c, dtype=float)
+    if name == "buildings":
+        return np.ones(A_ub.shape[1])
+    if name == "power":
+        return A_ub.getrow(0).toarray().ravel()
+    if name == "sloops":
+        return A_ub.getrow(A_ub.shape[0] - 1).toarray().ravel()
+    raise ValueError("Unknown objective: "+name)
+
+def lexicographic(objectives: list, A_ub, b_ub, A_eq, b_eq, tolerance=None, fixed=()) -> OptimizeResult:
+    """
+    minimizes the objective vectors one after another, each stage keeping the
+    earlier objectives within tolerance (relative to max(1, |optimum|),
+    LexTolerance by default) of their optimum. fixed holds (objective, value)
+    pairs already optimized elsewhere. With highspy all stages share one
+    resident model and each starts from the previous basis.
+    res.x is from the last stage solved, res.stages lists value, tolerance,
+    status and iterations per stage. A stage the resident model can't solve
+    is re-solved cold through _linprog, then once more with the earlier
+    bounds relaxed by 1e-6 relative. A later stage that still fails keeps
+    the previous x, with a warning through logger.
+    """
+    if tolerance is None:
+        tolerance = LexTolerance
+    res = OptimizeResult(x=None, fun=None, status=0, success=True, stages=[])
+    extra = [(np.asarray(o, dtype=float), v + tolerance * max(1.0, abs(v))) for o, v in fixed]
+
+    def cold(obj, relax):
+        ub, b = A_ub, b_ub
+        if extra:
+            ub = vstack([A_ub] + [csr_matrix(o) for o, _ in extra], format="csr")
+            b = np.concatenate([b_ub, [bound + relax * max(1.0, abs(bound)) for _, bound in extra]])
+        return _linprog(obj, ub, b, A_eq, b_eq)
+
+    model = None
+    if _resident():
+        model = HighsLP(objectives[0], A_ub, b_ub, A_eq, b_eq)
+        for o, bound in extra:
+            model.add_row(o, -highspy.kHighsInf, bound)
+    for k, obj in enumerate(objectives):
+        if model is not None:
+            if k > 0:
+                model.set_c(obj)
+            stage = model.solve()
+        if model is None or stage.status == 4:
+            # numerical trouble on the resident model's tight bound rows is retried cold
+            stage = cold(obj, 0.0)
+            if stage.status != 0 and k > 0:
+                # then with the bounds relaxed above the solvers' feasibility tolerance
+                stage = cold(obj, 1e-6)
+        if stage.status != 0 and k > 0:
+            logger.warning("lexicographic: stage %d failed (%s), keeping the plan of stage %d", k, stage.message, k - 1)
+        if stage.status != 0:
+            res.stages.append(OptimizeResult(value=None, tolerance=None, status=stage.status, nit=stage.get("nit")))
+            if k == 0:
+                res.status, res.success, res.message = stage.status, False, stage.message
+            break
+        slack = tolerance * max(1.0, abs(stage.fun))
+        res.stages.append(OptimizeResult(value=stage.fun, tolerance=slack, status=0, nit=stage.get("nit")))
+        res.x = stage.x
+        if k == 0:
+            res.fun = stage.fun
+            res.first = stage
+        if k + 1 < len(objectives):
+            extra.append((obj, stage.fun + slack))
+            if model is not None:
+                model.add_row(obj, -highspy.kHighsInf, stage.fun + slack)
+    return res
+
+class WarmSweep:
+    """
+    solve_sub for one target and changing numbers of power augmenters, with
+    both LP stages resident in HiGHS. Consecutive combinations only differ in
+    generator coefficients, power and sloop budgets and the Alien Power
+    Matrix demand, so each re-solve starts from the previous basis.
+    The target's balance row is kept but left without bounds, so retarget()
+    can switch targets by swapping the objective and which row is free.
+    That is solve_sub's zeroed target row as long as its right-hand side
+    is 0; otherwise both are infeasible.
+    """
+    def __init__(self, target: str, item_offsets=dict(), penalty=0.0, buildlimit=None):
+        self.lp = compiled_model().view(target, 0, 0, item_offsets, penalty, buildlimit)
+        lp = self.lp
+        self.stage1 = HighsLP(lp.c, lp.A_ub, lp.b_ub, lp.model.A_items, lp.b_eq)
+        self.freed = None
+        self._free(target)
+        self._stage2()
+
+    def _stage2(self):
+        # second stage: fewest recipe executions at the optimal objective value
+        lp = self.lp
+        self.stage2 = HighsLP(np.ones(lp.model.n), lp.A_ub, lp.b_ub, vstack([lp.model.A_items, csr_matrix(lp.c)], format="csr"), np.append(lp.b_eq, 0.0))
+        if self.freed is not None:
+            self.stage2.free_row(self.freed)
+
+    def _free(self, target: str):
+        rows = self.lp.model.itemrows
+        if self.freed is not None:
+            self.stage1.free_row(self.freed, free=False)
+        if target in rows:
+            self.stage1.free_row(rows[target])
+        self.freed = rows.get(target)
+
+    def retarget(self, target: str):
+        """
+        switches to another target. The first stage keeps its basis; the
+        second stage is rebuilt, since its optimal face changes completely
+        and restarting from the old basis costs more than starting fresh.
+        """
+        self.lp = self.lp.with_target(target)
+        self.stage1.set_c(self.lp.c)
+        self._free(target)
+        self._stage2()
+        return self
+
+    def solve(self, unfueled_APAs: int, fueled_APAs: int):
+        """[recipe dict, objective value] like solve_sub, or None if infeasible"""
+        lp = self.lp.with_apas(unfueled_APAs, fueled_APAs)
+        m = lp.model
+        if self.freed is not None and lp.b_eq[self.freed] != 0.0:
+            # ModelView zeroes the target's row, which leaves 0 = b_eq: infeasible unless b_eq is 0,
+            # and the free row is that zeroed row when it is
+            return None
+        power = lp.power[m.powercols]
+        for stage in (self.stage1, self.stage2):
+            stage.set_coeffs(0, m.powercols, power)
+            stage.set_b_ub(lp.b_ub)
+        self.stage1.set_b_eq(lp.b_eq)
+        res = self.stage1.solve()
+        if res.status != 0:
+            return None
+        self.stage2.set_b_eq(np.append(lp.b_eq, res.fun))
+        res2 = self.stage2.solve()
+        x = res2.x if res2.status == 0 else res.x
+        return [_plan(m, x), _value(lp.target, res.fun, lp.penalty, res.x)]
+
+# ----- block decomposition -----
+def blockStructure(lp: ModelView) -> tuple:
+    """
+    splits lp's columns into blocks that share no item balance or node row,
+    i.e. independent supply chains that only meet in the power, building
+    limit and sloop rows. Returns [blocks, master_cols]: blocks is a list of
+    column arrays of at least BlockMinSize recipes, master_cols holds the
+    columns of all smaller blocks.
+    """
+    A = vstack([lp.A_eq, lp.A_ub[1:1 + len(lp.model.nodeclasses)]], format="csr")
+    A = csr_matrix((np.ones(A.nnz), A.indices, A.indptr), shape=A.shape)
+    rows = A.shape[0]
+    _, labels = connected_components(bmat([[None, A], [A.T, None]], format="csr"), directed=False)
+    labels = labels[rows:]
+    blocks, master = [], []
+    for label in np.unique(labels):
+        cols = np.flatnonzero(labels == label)
+        (blocks if len(cols) >= BlockMinSize else master).append(cols)
+    master = np.sort(np.concatenate(master)) if master else np.zeros(0, dtype=int)
+    return blocks, master
+
+
+class BlockDecomposition:
+    """
+    Dantzig-Wolfe decomposition of lp on its coupling rows: power, building
+    limit and sloops. Each block of blockStructure() is priced as its own LP
+    under the coupling rows' duals and contributes its optimal plans as
+    proposals; the master problem picks a convex combination per block plus
+    the small-block columns directly. Blocks stay resident in HiGHS between
+    pricing rounds and are priced in parallel with processes > 1. The
+    proposals only depend on the block constraints, so when only the power
+    or sloop budget changes, update() keeps them and the next solve()
+    usually needs few or no pricing rounds.
+    """
+    def __init__(self, lp: ModelView):
+        self.lp = lp
+        self.blocks, self.master_cols = blockStructure(lp)
+        A_ub = lp.A_ub.tocsc()
+        self.coupling = [0] + ([lp.buildrow] if lp.buildrow is not None else []) + [lp.slooprow]
+        self.A_cpl = A_ub[self.coupling]
+        self.b_cpl = lp.b_ub[self.coupling]
+        inner = np.array([i for i in range(A_ub.shape[0]) if i not in self.coupling])
+        self.A_in, self.b_in = A_ub[inner], lp.b_ub[inner]
+        self.A_eq = lp.A_eq.tocsc()
+        self.proposals = [[] for _ in self.blocks] # per block: list of block solutions
+        self._models = dict()
+        self.rounds = 0
+
+    def update(self, lp: ModelView):
+        """takes over lp, which may only differ in the power and sloop budget"""
+        self.lp = lp
+        self.b_cpl = lp.b_ub[self.coupling]
+
+    def block_lp(self, k: int):
+        """c, A_ub, b_ub, A_eq, b_eq of block k on its own rows"""
+        cols = self.blocks[k]
+        A_ub, A_eq = self.A_in[:, cols].tocsr(), self.A_eq[:, cols].tocsr()
+        ub = np.diff(A_ub.indptr) > 0
+        eq = np.diff(A_eq.indptr) > 0
+        return self.lp.c[cols], A_ub[ub], self.b_in[ub], A_eq[eq], self.lp.b_eq[eq]
+
+    def price(self, k: int, duals: np.ndarray, phase1=False) -> OptimizeResult:
+        """
+        optimal plan of block k with the coupling rows priced at duals. In
+        phase 1 only the coupling rows count.
+        """
+        if k not in self._models:
+            self._models[k] = HighsLP(*self.block_lp(k)) if _resident() else self.block_lp(k)
+        model = self._models[k]
+        c = (0.0 if phase1 else self.lp.c[self.blocks[k]]) - self.A_cpl[:, self.blocks[k]].T @ duals
+        if not isinstance(model, HighsLP):
+            return _linprog(c, *model[1:])
+        model.set_c(c)
+        return model.solve()
+
+    def _master(self, phase1: bool):
+        """
+        the restricted master LP and its column layout. Phase 1 minimizes
+        artificial slack on the coupling rows until the proposals can meet
+        them, phase 2 the actual objective without that slack.
+        """
+        lp, m = self.lp, self.master_cols
+        c = [np.zeros(len(m)) if phase1 else lp.c[m]]
+        cpl = [self.A_cpl[:, m].toarray()]
+        conv = []
+        for k, props in enumerate(self.proposals):
+            for x in props:
+                c.append([0.0 if phase1 else lp.c[self.blocks[k]] @ x])
+                cpl.append((self.A_cpl[:, self.blocks[k]] @ x).reshape(-1, 1))
+                conv.append(k)
+        nprop = len(conv)
+        nart = len(self.coupling) if phase1 else 0
+        c = np.concatenate(c + [np.ones(nart)])
+        A_cpl = np.hstack(cpl + [-np.eye(len(self.coupling))[:, :nart]])
+        A_in = hstack([self.A_in[:, m], csr_matrix((self.A_in.shape[0], nprop + nart))], format="csr")
+        A_eq = hstack([self.A_eq[:, m], csr_matrix((self.A_eq.shape[0], nprop + nart))], format="csr")
+        convex = np.zeros((len(self.blocks), len(c)))
+        convex[conv, len(m) + np.arange(nprop)] = 1.0
+        # rows of the big blocks are satisfied inside the proposals
+        in_rows = (np.diff(A_in.indptr) > 0) | (self.b_in < 0)
+        eq_rows = (np.diff(A_eq.indptr) > 0) | ~np.isin(np.arange(self.A_eq.shape[0]), self._block_rows())
+        A_ub = vstack([csr_matrix(A_cpl), A_in[in_rows]], format="csr")
+        b_ub = np.concatenate([self.b_cpl, self.b_in[in_rows]])
+        A_eq = vstack([A_eq[eq_rows], csr_matrix(convex)], format="csr")
+        b_eq = np.concatenate([self.lp.b_eq[eq_rows], np.ones(len(self.blocks))])
+        return c, A_ub, b_ub, A_eq, b_eq, conv
+
+    def _block_rows(self) -> np.ndarray:
+        if not hasattr(self, "_rows"):
+            rows = [np.flatnonzero(np.diff(self.A_eq[:, cols].tocsr().indptr) > 0) for cols in self.blocks]
+            self._rows = np.concatenate(rows) if rows else np.zeros(0, dtype=int)
+        return self._rows
+
+    def solve(self, maxrounds=200, processes=1) -> OptimizeResult:
+        """x over all of lp's columns, fun, status and the pricing rounds taken"""
+        lp = self.lp
+        scale = max(1.0, np.abs(lp.c).max())
+        duals = np.zeros(len(self.coupling))
+        for k in range(len(self.blocks)):
+            if not self.proposals[k]:
+                res = self.price(k, duals)
+                if res.status != 0:
+                    return OptimizeResult(x=None, fun=None, status=res.status, success=False, message="block "+str(k)+": "+str(res.message), rounds=self.rounds)
+                self.proposals[k].append(res.x)
+        pool = None
+        if processes > 1 and len(self.blocks) > 1:
+            global _worker_decomposition
+            _worker_decomposition = self
+            ctx = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else multiprocessing.get_context()
+            pool = ctx.Pool(processes)
+        try:
+            for phase1 in (True, False):
+                for _ in range(maxrounds):
+                    c, A_ub, b_ub, A_eq, b_eq, conv = self._master(phase1)
+                    res = _linprog(c, A_ub, b_ub, A_eq, b_eq)
+                    if res.status != 0:
+                        return OptimizeResult(x=None, fun=None, status=res.status, success=False, message="master: "+str(res.message), rounds=self.rounds)
+                    if phase1 and res.fun <= 1e-9 * max(1.0, np.abs(self.b_cpl).max()):
+                        break
+                    self.rounds += 1
+                    duals = res.ineqlin.marginals[:len(self.coupling)]
+                    mu = res.eqlin.marginals[-len(self.blocks):]
+                    if pool is not None:
+                        priced = pool.map(_price_block, [(k, duals, phase1) for k in range(len(self.blocks))])
+                    else:
+                        priced = [self.price(k, duals, phase1) for k in range(len(self.blocks))]
+                    entered = False
+                    for k, sub in enumerate(priced):
+                        if sub.status != 0:
+                            return OptimizeResult(x=None, fun=None, status=sub.status, success=False, message="block "+str(k)+" pricing failed", rounds=self.rounds)
+                        if sub.fun - mu[k] < -1e-9 * (1.0 if phase1 else scale):
+                            self.proposals[k].append(sub.x)
+                            entered = True
+                    if not entered:
+                        break
+                if phase1 and res.fun > 1e-9 * max(1.0, np.abs(self.b_cpl).max()):
+                    return OptimizeResult(x=None, fun=None, status=2, success=False, message="infeasible coupling rows", rounds=self.rounds)
+        finally:
+            if pool is not None:
+                pool.close()
+        nmaster = len(self.master_cols)
+        x = np.zeros(lp.model.n)
+        x[self.master_cols] = res.x[:nmaster]
+        props = [p for props in self.proposals for p in props]
+        for j, k in enumerate(conv):
+            x[self.blocks[k]] += res.x[nmaster + j] * props[j]
+        return OptimizeResult(x=x, fun=float(lp.c @ x), status=0, success=True, message="optimal", rounds=self.rounds)
+
+_worker_decomposition = None
+
+def _price_block(args):
+    k, duals, phase1 = args
+    res = _worker_decomposition.price(k, duals, phase1)
+    return OptimizeResult(status=res.status, fun=res.get("fun"), x=res.get("x"))
+
+_decompositions = dict() # cache of BlockDecomposition by everything but the power and sloop budget, in order of use. cleared on recompile
+
+def decomposition(lp: ModelView) -> BlockDecomposition:
+    """the cached BlockDecomposition for lp, created if needed"""
+    m = lp.model
+    key = (id(m), lp.target, lp.unfueled_APAs, lp.fueled_APAs, tuple(sorted(lp.item_offsets.items())), lp.penalty, lp.buildlimit is None, m.b_nodes.tobytes())
+    if key not in _decompositions:
+        while _decompositions and len(_decompositions) >= DecompositionCache:
+            del _decompositions[next(iter(_decompositions))]
+        dec = BlockDecomposition(lp)
+    else:
+        dec = _decompositions.pop(key)
+        dec.update(lp)
+    if DecompositionCache > 0:
+        _decompositions[key] = dec
+    return dec
+
+# ----- integer sloops -----
+def sloopMILP(lp: ModelView, sloops_first=False) -> OptimizeResult:
+    """
+    lp with integer building counts on every Somersloop variant, the other
+    columns continuous. Each variant is bounded by how many buildings the
+    sloop budget alone allows. With highspy the LP relaxation is solved
+    first and a rounded incumbent built from it is handed to branch and
+    bound: every variant fixed at the floor of its LP value and the rest
+    re-solved, or with sloops_first a dive fixing variants one sloop count
+    at a time, most sloops first, re-solving in between. Without highspy
+    scipy.optimize.milp solves it cold. res.bound and res.gap report the
+    dual bound and final gap.
+    """
+    m = lp.model
+    cols = np.flatnonzero(m.sloops > 0)
+    upper = np.floor(lp.b_sloops / m.sloops[cols] + 1e-9)
+    if highspy is None:
+        integrality = np.zeros(m.n)
+        integrality[cols] = 1
+        ub = np.full(m.n, np.inf)
+        ub[cols] = upper
+        res = milp(lp.c, constraints=[LinearConstraint(lp.A_ub, -np.inf, lp.b_ub), LinearConstraint(lp.A_eq, lp.b_eq, lp.b_eq)],
+                   integrality=integrality, bounds=Bounds(0.0, ub), options=dict(mip_rel_gap=MipGap))
+        res.bound = res.get("mip_dual_bound")
+        res.gap = res.get("mip_gap")
+        return res
+    model = HighsLP(lp.c, lp.A_ub, lp.b_ub, lp.A_eq, lp.b_eq)
+    model.set_bounds(cols, np.zeros(len(cols)), upper)
+    relax = model.solve()
+    if relax.status != 0:
+        return relax
+    x = relax.x
+    if sloops_first:
+        groups = [cols[m.sloops[cols] == k] for k in np.unique(m.sloops[cols])[::-1]]
+    else:
+        groups = [cols]
+    incumbent = None
+    for group in groups:
+        fixed = np.floor(x[group] + 1e-9)
+        model.set_bounds(group, fixed, fixed)
+        res = model.solve()
+        if res.status != 0:
             break
+        x = res.x
+    else:
+        incumbent = x
+    model.set_bounds(cols, np.zeros(len(cols)), upper)
+    model.set_integer(cols)
+    model.h.setOptionValue("mip_rel_gap", MipGap)
+    if incumbent is not None:
+        model.h.setSolution(model.n, np.arange(model.n, dtype=np.int32), incumbent)
+    res = model.solve()
+    info = model.h.getInfo()
+    res.bound = info.mip_dual_bound
+    res.gap = info.mip_gap
+    res.relaxation = relax.fun
+    return res
+
+# ----- solving -----
+def solve_sub(target: str, unfueled_APAs: int, fueled_APAs: int, item_offsets=dict(), penalty=0.0, outputMatrices=False, buildlimit=None, use_presolve=None, extraction="grid", sloops="grid", objectives=("target", "buildings"), integer_sloops=False, sloops_first=False, decompose=False, processes=1):
+    """
+    maximizes target at the given power augmenters. Ties are broken by the
+    later objectives, see lexicographic(); last_lexicographic holds the
+    stage report. integer_sloops=True makes Somersloop building counts
+    integral, see sloopMILP(); decompose=True solves by Dantzig-Wolfe
+    decomposition over independent supply chains, see BlockDecomposition,
+    pricing blocks on processes workers. Ties are not broken in either.
+    """
+    global last_presolve, last_lexicographic
+    if objectives[0] != "target":
+        raise ValueError("The first objective of solve_sub must be \"target\".")
+    model = compiled_model()
+    lp = model.view(target, unfueled_APAs, fueled_APAs, item_offsets, penalty, buildlimit)
+    c, A_ub, b_ub, A_eq, b_eq = lp.c, lp.A_ub, lp.b_ub, lp.A_eq, lp.b_eq
+    columns = model
+    if extraction not in ("grid", "colgen", "oa"):
+        raise ValueError("Unknown extraction mode: "+str(extraction))
+    if sloops not in ("grid", "colgen"):
+        raise ValueError("Unknown sloops mode: "+str(sloops))
+    if decompose:
+        if extraction != "grid" or sloops != "grid" or integer_sloops:
+            raise ValueError("decompose needs the grid extraction and sloops modes and continuous sloops.")
+        res = decomposition(lp).solve(processes=processes)
+        if res.status != 0:
+            return [c, A_ub, b_ub, A_eq]
+        if outputMatrices:
+            return {"c":c, "A_ub":A_ub, "b_ub":b_ub, "A_eq":A_eq, "x":res.x}
+        return [_plan(model, res.x), _value(target, res.fun, penalty, res.x)]
+    if integer_sloops:
+        if extraction != "grid" or sloops != "grid":
+            raise ValueError("integer_sloops needs the grid extraction and sloops modes.")
+        res = sloopMILP(lp, sloops_first)
+        if res.status != 0 or res.x is None:
+            return [c, A_ub, b_ub, A_eq]
+        if outputMatrices:
+            return {"c":c, "A_ub":A_ub, "b_ub":b_ub, "A_eq":A_eq, "x":res.x}
+        return [_plan(model, res.x), _value(target, res.fun, penalty, res.x)]
+    if extraction == "oa":
+        if sloops != "grid":
+            raise ValueError("extraction=\"oa\" needs the grid sloops mode.")
+        # continuous extractor clocks, power bounded by lazily added tangent cuts
+        columns = OuterApproximation(lp)
+        res = columns.solve(objectives)
+        last_lexicographic = res.stages
+        if res.status != 0:
+            return [c, A_ub, b_ub, A_eq]
+        if outputMatrices:
+            c, A_ub, b_ub, A_eq, b_eq = columns.A
+            return {"c":c, "A_ub":A_ub, "b_ub":b_ub, "A_eq":A_eq, "x":res.x}
+        return [columns.plan(res.x), _value(target, res.fun, penalty, res.first.x * columns.counted())]
+    if "colgen" not in (extraction, sloops) and not outputMatrices and not (Presolve if use_presolve is None else use_presolve) and _resident():
+        # every stage on one resident model, warm-started from the previous one
+        res = lexicographic([lexObjective(o, c, A_ub) for o in objectives], A_ub, b_ub, A_eq, b_eq)
+        last_presolve = PresolveReport(A_eq.shape[0] + A_ub.shape[0], model.n)
+        last_lexicographic = res.stages
+        if res.status != 0:
+            return [c, A_ub, b_ub, A_eq]
+        return [_plan(model, res.x), _value(target, res.fun, penalty, res.first.x)]
+    if "colgen" in (extraction, sloops):
+        # extraction clocks and sloop variants priced in one by one instead of the fixed grids
+        columns = ColumnGeneration(lp, extraction == "colgen", sloops == "colgen")
+        res = columns.solve()
+        if res.status != 0:
+            return [c, A_ub, b_ub, A_eq]
+        c, A_ub, A_eq = columns.A
+        candidates = keep = np.ones(len(c), dtype=bool)
+        res = OptimizeResult(x=res.x, fun=res.fun, status=res.status, cols=np.arange(len(c)))
+    else:
+        if use_presolve is None:
+            use_presolve = Presolve and not outputMatrices
+        if use_presolve:
+            candidates, keep, last_presolve = presolve(lp)
+        else:
+            candidates = keep = np.ones(model.n, dtype=bool)
+            last_presolve = PresolveReport(A_eq.shape[0] + A_ub.shape[0], model.n)
+        # solve
+        res = _linprog_sifted(c, A_ub, b_ub, A_eq, b_eq, candidates, keep, last_presolve)
     if res.status != 0:
         #print("Couldn't solve for",target,", Status:",res.status)
         return [c, A_ub, b_ub, A_eq]
     assert res.status == 0
     if outputMatrices:
         return {"c":c, "A_ub":A_ub, "b_ub":b_ub, "A_eq":A_eq, "x":res.x}
-    val = -res.fun
-    val += penalty * np.sum(res.x)
+    val = _value(target, res.fun, penalty, res.x)
+    stored_x = res.x
+    # later stages on the candidate columns, the target kept at its optimum
+    cols = np.flatnonzero(candidates)
+    A_ub, A_eq = A_ub.tocsc()[:, cols].tocsr(), A_eq.tocsc()[:, cols].tocsr()
+    lex = lexicographic([lexObjective(o, c[cols], A_ub) for o in objectives[1:]], A_ub, b_ub, A_eq, b_eq, fixed=[(c[cols], res.fun)])
+    tol = LexTolerance * max(1.0, abs(res.fun))
+    last_lexicographic = [OptimizeResult(value=res.fun, tolerance=tol, status=0, nit=res.get("nit"))] + lex.stages
+    if lex.x is not None:
+        stored_x = np.zeros(len(c))
+        stored_x[cols] = lex.x
+    return [_plan(columns, stored_x), val]
+
+def _value(target: str, fun: float, penalty: float, x: np.ndarray) -> float:
+    val = -fun
+    val += penalty * np.sum(x)
     # undo the manual scaling of expensive milestone recipes
     if target == "ProjectAssembly4":
         val /= 1000.0
-    stored_x = res.x
-    A_eq = np.vstack([A_eq, c])
-    b_eq= np.append(b_eq, res.fun)
-    c = np.ones(len(Recipes))
-    res = linprog(c, A_ub, b_ub, A_eq, b_eq, method=solver_method, options=solver_options)
-    if not res.success:
-        for met in ('revised simplex', 'highs-ds', 'highs', 'simplex', 'highs-ipm', 'interior-point'):
-            solver_method = met
-            res = linprog(c, A_ub, b_ub, A_eq, b_eq, method=solver_method, options=solver_options)
-            if res.success:
-                #print("solver method used 2nd:",solver_method)
-                break
-    if res.status == 0:
-        if not np.equal(stored_x, res.x).all():
-            stored_x = res.x
+    return val
+
+def _plan(columns, x: np.ndarray) -> dict:
+    """recipe name -> multiplicity of the positive entries of x. columns is a CompiledModel or ColumnGeneration"""
     recps = dict()
-    for i in range(len(Recipes)):
-        if stored_x[i] > 10**(-9) and type(Recipes[i]) != MilestoneRecipe:
-            recps[Recipes[i].name] = stored_x[i]
-    recps = dict((x,recps[x]) for x in sorted(recps))
-    return [recps, val]
+    for i in np.flatnonzero(x > 10**(-9)):
+        if type(columns.recipe(i)) != MilestoneRecipe:
+            recps[columns.name(i)] = x[i]
+    return dict((x,recps[x]) for x in sorted(recps))
+
+def apaCombinations() -> list:
+    """all (unfueled_APAs, fueled_APAs) the sloop budget allows, in sweep order"""
+    return [(total_APAs - powered, powered) for total_APAs in range(TotalSomersloops//10 + 1) for powered in range(total_APAs + 1)]
+
+def _sweep(target: str, combinations: list, warmstart: bool, sweep=None) -> list:
+    """
+    [(unfueled_APAs, fueled_APAs), result] per combination, result as
+    solve_sub or None. sweep is a WarmSweep to reuse.
+    """
+    if sweep is None and warmstart and _resident():
+        sweep = WarmSweep(target)
+    out = []
+    for u, f in combinations:
+        if sweep is not None:
+            res = sweep.solve(u, f)
+        else:
+            res = solve_sub(target, u, f)
+        if res is not None and not isinstance(res[0], dict):
+            res = None
+        out.append([(u, f), res])
+    return out
+
+_worker_args = None
+_worker_sweep = None
+# module settings a worker process needs; spawned workers re-import the module with the defaults
+_WorkerSettings = ("FreeExtraPower", "TotalSomersloops", "GeysersOccupied", "PumpsPerPipe", "MinerMK", "BeltMK", "PipeMK",
+                   "Nodes", "Wells", "ExtractClockSteps", "SloopClockSteps", "ColGenInitialClocks", "OATolerance",
+                   "LexTolerance", "Presolve", "SolverBackend", "BlockMinSize", "MipGap")
+
+def _worker_pool(processes: int, target, warmstart: bool):
+    """
+    process pool running _sweep_init. With fork the workers inherit the
+    compiled model copy-on-write, otherwise it is pickled once per worker
+    rather than once per task. Settings are passed along either way.
+    """
+    compiled_model() # compile before the workers start
+    if "fork" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("fork")
+        compiled = None
+    else:
+        ctx = multiprocessing.get_context()
+        compiled = _compiled
+    settings = dict((name, globals()[name]) for name in _WorkerSettings)
+    return ctx.Pool(processes, initializer=_sweep_init, initargs=(target, warmstart, compiled, settings))
+
+def _sweep_init(target, warmstart: bool, compiled, settings: dict):
+    global _worker_args, _compiled, _worker_sweep
+    globals().update(settings)
+    if compiled is not None:
+        # the parent's model, whatever recipes this process registered on import
+        _compiled = (_modelKey(), compiled[1])
+    _worker_args = (target, warmstart)
+    _worker_sweep = None
+
+def _sweep_chunk(combinations: list) -> list:
+    """_sweep in a worker, which keeps one WarmSweep across its chunks"""
+    global _worker_sweep
+    target, warmstart = _worker_args
+    if warmstart and _resident() and _worker_sweep is None:
+        _worker_sweep = WarmSweep(target)
+    return _sweep(target, combinations, warmstart, _worker_sweep)
+
+def _sweep_parallel(target: str, combinations: list, warmstart: bool, processes: int) -> list:
+    """
+    _sweep over a process pool. Each worker gets contiguous chunks so its
+    resident model warm-starts between neighbouring combinations.
+    """
+    nchunks = min(len(combinations), 4*processes)
+    bounds = np.linspace(0, len(combinations), nchunks + 1).astype(int)
+    chunks = [combinations[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    with _worker_pool(processes, target, warmstart) as pool:
+        out = []
+        for part in pool.imap(_sweep_chunk, chunks):
+            out.extend(part)
+    return out
+
+def solve(target: str, warmstart=True, processes=None, integer=False, time_budget=None, callback=None):
+    """
+    best solve_sub result over all power augmenter combinations, with the
+    combination appended. processes defaults to the Processes setting.
+    integer=True picks the combination with one MILP instead, see solve_milp.
+    With a time_budget in seconds or a callback, runs solve_anytime instead
+    and returns its last report; callback gets every improved one.
+    """
+    if integer:
+        return solve_milp(target)
+    if time_budget is not None or callback is not None:
+        for report in solve_anytime(target, time_budget, warmstart):
+            if callback is not None and not report.final:
+                callback(report)
+        return report
+    if processes is None:
+        processes = Processes
+    combinations = apaCombinations()
+    if processes > 1:
+        results = _sweep_parallel(target, combinations, warmstart, processes)
+    else:
+        results = _sweep(target, combinations, warmstart)
+    return _best(results)
 
-def solve(target: str):
+def _best(results: list):
+    """best _sweep result in sweep order, with its combination appended"""
+    order = dict((c, i) for i, c in enumerate(apaCombinations()))
     best = None
-    for total_APAs in range(TotalSomersloops//10 + 1):
-        for powered in range(total_APAs + 1):
-            res = solve_sub(target, total_APAs - powered, powered)
-            if best is None or res[1] > best[1]:
-                best = res + [total_APAs - powered, powered]
+    for (u, f), res in sorted(results, key=lambda r: order[r[0]]):
+        if res is None:
+            continue
+        if best is None or res[1] > best[1]:
+            best = res + [u, f]
     return best
 
+def apaBounds(target: str) -> dict:
+    """
+    upper bound on the objective value for each total number of power
+    augmenters: the LP with all of them fueled for power, the sloop budget
+    of that total, and the Alien Power Matrix demand relaxed to anywhere
+    between none and all fueled. It covers every split of that total.
+    """
+    lp = compiled_model().view(target, 0, 0, dict(), 0.0, None)
+    m = lp.model
+    apm = m.itemrows["Alien Power Matrix"]
+    row = lp.A_eq.getrow(apm)
+    keep = np.arange(lp.A_eq.shape[0]) != apm
+    A_ub = vstack([lp.A_ub, row, -row], format="csr")
+    bounds = dict()
+    model = None
+    for total in sorted(set(u + f for u, f in apaCombinations())):
+        lpn = lp.with_apas(0, total)
+        b_ub = np.concatenate([lpn.b_ub, [0.0, 5.0 * total]])
+        if _resident():
+            if model is None:
+                model = HighsLP(lpn.c, A_ub, b_ub, lpn.A_eq, lpn.b_eq)
+                model.free_row(apm)
+            model.set_coeffs(0, m.powercols, lpn.power[m.powercols])
+            model.set_b_ub(b_ub)
+            res = model.solve()
+        else:
+            A_ub[0] = csr_matrix(lpn.power)
+            res = _linprog(lpn.c, A_ub, b_ub, lpn.A_eq[keep], lpn.b_eq[keep])
+        bounds[total] = _value(target, res.fun, 0.0, res.x) if res.status == 0 else -np.inf
+    return bounds
+
+def solve_anytime(target: str, time_budget=None, warmstart=True):
+    """
+    solve() that can be stopped early. Combinations are tried in order of
+    their apaBounds bound, most power first within a total, and any whose
+    bound can't beat the incumbent are pruned unsolved. At least one is
+    solved whatever the budget. Yields a report each time the incumbent
+    improves and a final one (final=True) once all are solved or pruned,
+    or the time_budget in seconds has run out: best (as
+    solve), bound (best value still possible), gap (bound - best value),
+    skipped (unsolved combinations that could still be better), pruned,
+    solved and elapsed seconds.
+    """
+    start = time.perf_counter()
+    bounds = apaBounds(target)
+    order = sorted(apaCombinations(), key=lambda c: (-bounds[sum(c)], -c[1]))
+    sweep = WarmSweep(target) if warmstart and _resident() else None
+    best = None
+    solved, pruned, skipped = [], [], []
+
+    def report(final):
+        value = best[1] if best is not None else -np.inf
+        bound = max([value] + [bounds[u + f] for u, f in skipped])
+        return OptimizeResult(best=best, bound=bound, gap=bound - value, skipped=list(skipped), pruned=list(pruned), solved=list(solved), elapsed=time.perf_counter() - start, final=final)
+
+    for i, (u, f) in enumerate(order):
+        if best is not None and bounds[u + f] < best[1] - 1e-9 * max(1.0, abs(best[1])):
+            pruned.append((u, f))
+            continue
+        if time_budget is not None and solved and time.perf_counter() - start > time_budget:
+            skipped = [c for c in order[i:] if best is None or bounds[sum(c)] >= best[1] - 1e-9 * max(1.0, abs(best[1]))]
+            pruned += [c for c in order[i:] if c not in skipped]
+            break
+        res = _sweep(target, [(u, f)], warmstart, sweep)[0][1]
+        solved.append((u, f))
+        if res is not None and (best is None or res[1] > best[1]):
+            best = res + [u, f]
+            yield report(False)
+    yield report(True)
+
+def allTargets() -> list:
+    """"AWESOME points", every milestone recipe and every balanced item"""
+    milestones = [r.name for r in Recipes.objects if type(r) == MilestoneRecipe]
+    return ["AWESOME points"] + milestones + list(compiled_model().items)
+
+def _similar_order(targets: list) -> list:
+    """
+    targets ordered so that neighbours tend to share supply chains: by the
+    first recipe, in registration order, that touches them
+    """
+    m = compiled_model()
+    A = m.A_items.tocsr()
+    def key(target):
+        if target in m.itemrows:
+            cols = A.indices[A.indptr[m.itemrows[target]]:A.indptr[m.itemrows[target]+1]]
+            return cols.min() if len(cols) else m.n
+        col = m.column(target)
+        return -1 if col is None else col
+    return sorted(targets, key=key)
+
+def _solve_targets(targets: list, warmstart: bool):
+    """yields (target, solve(target)), reusing this process' WarmSweep across calls"""
+    global _worker_sweep
+    combinations = apaCombinations()
+    for target in targets:
+        if warmstart and _resident():
+            _worker_sweep = WarmSweep(target) if _worker_sweep is None else _worker_sweep.retarget(target)
+        yield (target, _best(_sweep(target, combinations, warmstart, _worker_sweep)))
+
+def _targets_chunk(targets: list) -> list:
+    return list(_solve_targets(targets, _worker_args[1]))
+
+def solve_many(targets=None, warmstart=True, processes=None):
+    """
+    generator of (target, solve(target)) for each target, all of them by
+    default (see allTargets()). The model is compiled once; a resident
+    WarmSweep only swaps objective and freed balance row between targets,
+    which are visited in an order that keeps similar supply chains
+    together. With processes > 1 (default Processes) small batches of
+    targets are spread over worker processes and yielded as they finish,
+    so the order of the results is not that of targets.
+    """
+    global _worker_sweep
+    if targets is None:
+        targets = allTargets()
+    if processes is None:
+        processes = Processes
+    targets = _similar_order(list(targets))
+    _worker_sweep = None
+    if processes <= 1:
+        yield from _solve_targets(targets, warmstart)
+        return
+    size = max(1, min(4, len(targets) // (4*processes)))
+    chunks = [targets[i:i+size] for i in range(0, len(targets), size)]
+    with _worker_pool(processes, None, warmstart) as pool:
+        for part in pool.imap_unordered(_targets_chunk, chunks):
+            for item in part:
+                yield item
+
+def _generator_bound(lp: ModelView, G: np.ndarray) -> float:
+    """
+    lower bound on the generator power G @ x over all power augmenter
+    combinations: power and sloop rows dropped and Alien Power Matrix
+    demand relaxed.
+    """
+    m = lp.model
+    apm = m.itemrows["Alien Power Matrix"]
+    lb = lp.b_eq.copy()
+    lb[apm] -= 5.0 * (TotalSomersloops // 10)
+    rows = [LinearConstraint(lp.A_eq, lb, lp.b_eq), LinearConstraint(lp.A_ub[1:lp.slooprow], -np.inf, lp.b_ub[1:lp.slooprow])]
+    res = milp(G, constraints=rows)
+    if res.status == 2:
+        raise ValueError("No feasible plan for "+str(lp.target)+" at any power augmenter combination.")
+    elif res.status == 3:
+        raise ValueError("Generator output is unbounded for "+str(lp.target)+", can't linearize the power augmenters.")
+    elif res.status != 0:
+        raise ValueError("Bounding generator output for "+str(lp.target)+" failed: "+str(res.message))
+    return min(res.fun, 0.0)
+
+def solve_milp(target: str, item_offsets=dict(), penalty=0.0, buildlimit=None):
+    """
+    like solve(), but with the power augmenter combination as integer
+    variables of one MILP instead of enumerating it. One binary z per
+    combination (u, f) selects FreePower(u, f), the sloop budget and the
+    Alien Power Matrix demand. Generators scale with the boost level k = u+3f,
+    so their power G @ x * (1 + k/10) is linearized exactly as
+    G @ x + sum_k k/10 * w_k with w_k = G @ x * [level k chosen], which
+    McCormick bounds pin down because G @ x lies in [L, 0].
+    The plan is then taken from solve_sub at the chosen combination.
+    """
+    lp = compiled_model().view(target, 0, 0, item_offsets, penalty, buildlimit)
+    m = lp.model
+    n = m.n
+    combos = apaCombinations()
+    C = len(combos)
+    u = np.array([c[0] for c in combos])
+    f = np.array([c[1] for c in combos])
+    levels = np.unique(u + 3*f)
+    levels = levels[levels > 0]
+    K = len(levels)
+    G = np.zeros(n)
+    G[m.powercols] = lp.power[m.powercols]
+    L = _generator_bound(lp, G)
+    # variables: x (n), z (C), w (K)
+    N = n + C + K
+    cost = np.concatenate([lp.c, np.zeros(C + K)])
+    A_ub = lp.A_ub
+    b_ub = lp.b_ub.copy()
+    power = hstack([A_ub[0], csr_matrix(-np.array([FreePower(a, b) for a, b in combos]).reshape(1, C)), csr_matrix(levels.reshape(1, K) / 10.0)])
+    middle = hstack([A_ub[1:lp.slooprow], csr_matrix((lp.slooprow - 1, C + K))])
+    sloop = hstack([A_ub[lp.slooprow], csr_matrix(10.0 * (u + f).reshape(1, C)), csr_matrix((1, K))])
+    rows = [LinearConstraint(vstack([power, middle, sloop], format="csr"), -np.inf, np.concatenate([[0.0], b_ub[1:lp.slooprow], [TotalSomersloops]]))]
+    apm = np.zeros((len(m.items), C))
+    apm[m.itemrows["Alien Power Matrix"]] = 5.0 * f
+    b_eq = lp.b_eq.copy() # at f = 0
+    rows.append(LinearConstraint(hstack([lp.A_eq, csr_matrix(apm), csr_matrix((len(m.items), K))], format="csr"), b_eq, b_eq))
+    rows.append(LinearConstraint(csr_matrix(np.concatenate([np.zeros(n), np.ones(C), np.zeros(K)])), 1.0, 1.0))
+    # McCormick rows per level k: w_k >= L*delta_k, w_k >= G@x, w_k - G@x - L*delta_k <= -L
+    delta = csr_matrix((u + 3*f == levels[:, None]).astype(float))
+    Gx = csr_matrix(np.tile(G, (K, 1)))
+    I = csr_matrix(np.eye(K))
+    Z = csr_matrix((K, n))
+    rows.append(LinearConstraint(hstack([Z, -L * delta, I], format="csr"), 0.0, np.inf))
+    rows.append(LinearConstraint(hstack([-Gx, csr_matrix((K, C)), I], format="csr"), 0.0, np.inf))
+    rows.append(LinearConstraint(hstack([-Gx, -L * delta, I], format="csr"), -np.inf, -L))
+    integrality = np.concatenate([np.zeros(n), np.ones(C), np.zeros(K)])
+    bounds = Bounds(np.concatenate([np.zeros(n + C), np.full(K, L)]), np.concatenate([np.full(n, np.inf), np.ones(C), np.zeros(K)]))
+    res = milp(cost, constraints=rows, integrality=integrality, bounds=bounds)
+    if res.status != 0:
+        logger.warning("solve_milp: %s", res.message)
+        return None
+    i = int(np.argmax(res.x[n:n + C]))
+    best = solve_sub(target, int(u[i]), int(f[i]), item_offsets=item_offsets, penalty=penalty, buildlimit=buildlimit)
+    return best + [int(u[i]), int(f[i])]
+
+def pareto(target, axes=("objective", "buildings", "power"), unfueled_APAs=0, fueled_APAs=0, item_offsets=dict(), points=9, depth=8, tol=1e-4):
+    """
+    Pareto frontier of the target objective (maximized) against one or two
+    of "buildings" (total recipe multiplicity), "power" (net power drawn)
+    and "sloops" (all minimized), by an epsilon-constraint sweep: the target
+    is maximized with each other axis bounded, on one resident model that
+    re-solves warm as the bounds move. Along the last axis, intervals whose
+    midpoint lies more than tol (relative) off the chord are bisected up to
+    depth times, so points gather where the frontier bends; with two such
+    axes the first one is stepped over points levels. Dominated points are
+    dropped. Returns axes, points (one row of axis values per point) and
+    the plans.
+    """
+    if highspy is None:
+        raise ImportError("pareto() requires highspy")
+    if axes[0] != "objective" or not 2 <= len(axes) <= 3:
+        raise ValueError("axes must be \"objective\" followed by one or two of \"buildings\", \"power\", \"sloops\".")
+    lp = compiled_model().view(target, unfueled_APAs, fueled_APAs, item_offsets, 0.0, None)
+    vectors = [lexObjective(axis, lp.c, lp.A_ub) for axis in axes[1:]]
+    n_ub = A_ub_rows(lp)
+    rows = [n_ub + k for k in range(len(vectors))]
+    model = HighsLP(lp.c, vstack([lp.A_ub] + [csr_matrix(v) for v in vectors], format="csr"), np.concatenate([lp.b_ub, np.full(len(vectors), np.inf)]), lp.A_eq, lp.b_eq)
+    found = []
+
+    def evaluate(row, eps):
+        model.set_rhs(row, eps)
+        res = model.solve()
+        if res.status != 0:
+            return None
+        found.append(res.x)
+        return _value(target, res.fun, 0.0, res.x)
+
+    def extent(row, vector):
+        """least value of vector, and its value at the unconstrained optimum"""
+        model.set_rhs(row, np.inf)
+        model.set_c(vector)
+        res = model.solve()
+        model.set_c(lp.c)
+        if res.status != 0:
+            return None
+        top = model.solve()
+        return res.fun, vector @ top.x
+
+    def sweep(row, vector):
+        span = extent(row, vector)
+        if span is None:
+            return
+        lo, hi = span
+        grid = np.linspace(lo, hi, points)
+        values = [evaluate(row, e) for e in grid]
+        scale = max(1.0, max(abs(v) for v in values if v is not None) if any(v is not None for v in values) else 1.0)
+        intervals = [(grid[i], values[i], grid[i+1], values[i+1], 0) for i in range(len(grid) - 1)]
+        while intervals:
+            e1, v1, e2, v2, d = intervals.pop()
+            if v1 is None or v2 is None or d >= depth:
+                continue
+            em = (e1 + e2) / 2
+            vm = evaluate(row, em)
+            if vm is not None and abs(vm - (v1 + v2) / 2) > tol * scale:
+                intervals.append((e1, v1, em, vm, d + 1))
+                intervals.append((em, vm, e2, v2, d + 1))
+        model.set_rhs(row, np.inf)
+
+    if len(vectors) == 1:
+        sweep(rows[0], vectors[0])
+    else:
+        span = extent(rows[0], vectors[0])
+        if span is not None:
+            for level in np.linspace(span[0], span[1], points):
+                model.set_rhs(rows[0], level)
+                sweep(rows[1], vectors[1])
+    # frontier: no other point at least as good on every axis
+    table = np.array([[_value(target, lp.c @ x, 0.0, x)] + [v @ x for v in vectors] for x in found]).reshape(-1, len(axes))
+    signs = np.concatenate([[-1.0], np.ones(len(vectors))]) # minimize all
+    scaled = table * signs
+    slack = tol * np.maximum(1.0, np.abs(scaled).max(axis=0))
+    keep = []
+    for i in np.argsort(scaled[:, 1]):
+        better = np.all(scaled <= scaled[i] + slack, axis=1) & np.any(scaled < scaled[i] - slack, axis=1)
+        if not better.any() and not any(np.all(np.abs(scaled[j] - scaled[i]) <= slack) for j in keep):
+            keep.append(i)
+    return OptimizeResult(axes=tuple(axes), points=table[keep], plans=[_plan(lp.model, found[i]) for i in keep])
+
 def prettyprint(recpdict: dict):
     for r in recpdict:
         print(r,":",f"{recpdict[r]:.7g}")
@@ -1138,11 +3314,11 @@ def flow(item: str, rd: dict) -> list:
     sinks = dict(sorted(sinks.items(), key = lambda x: x[1], reverse=True))
     return [inflow, sources, outflow, sinks]
 
-def nlextract(resource: str, quota: float, minclock=0.0):
+def _extractMethods(resource: str) -> list:
+    """[building, val, num, base rate, base power, limit] per extraction method of resource"""
     if resource not in ExtractBuildings:
         raise KeyError("resource not recognized: "+resource)
     methods = list()
-    # method: [building, val, num, base rate, base power, limit]
     if "Resource Well Pressurizer" in ExtractBuildings[resource]:
         for v in Wells[resource]:
             methods.append(["Resource Well Pressurizer", v, Wells[resource][v], v*30.0, 150.0, maxExtractClock(resource, "Resource Well Pressurizer", v)])
@@ -1152,58 +3328,56 @@ def nlextract(resource: str, quota: float, minclock=0.0):
     if "Miner" in ExtractBuildings[resource]:
         for v in Nodes[resource]:
             methods.append(["Miner", v, Nodes[resource][v], v*MinerBaseSpeed[MinerMK-1,0], MinerBasePower[MinerMK], maxExtractClock(resource, "Miner", v)])
-    if quota > sum(x[2]*x[3]*x[5] for x in methods):
+    return methods
+
+def _waterfill(num, rate, power, limit, quotas, minclock=0.0) -> np.ndarray:
+    """
+    clocks minimizing sum(num*power*clock**ProcPowerExponent) subject to
+    sum(num*rate*clock) = quota and minclock <= clock <= limit, one row per
+    quota. By the KKT conditions clock = clip(mu*a, minclock, limit) with
+    a = (rate/power)**(1/(ProcPowerExponent-1)), so the extracted amount is
+    piecewise linear in mu with a kink wherever a method leaves minclock or
+    reaches its limit. One sort of the kinks serves all quotas.
+    """
+    a = (rate / power) ** (1 / (ProcPowerExponent - 1))
+    w = num * rate
+    mus = np.concatenate([minclock / a, limit / a])
+    order = np.argsort(mus, kind="stable")
+    mus = mus[order]
+    slope = np.cumsum(np.concatenate([w * a, -w * a])[order]) # d amount / d mu right of each kink
+    amount = minclock * w.sum() + np.concatenate([[0.0], np.cumsum(slope[:-1] * np.diff(mus))])
+    quotas = np.atleast_1d(np.asarray(quotas, dtype=float))
+    i = np.clip(np.searchsorted(amount, quotas, side="right") - 1, 0, len(mus) - 1)
+    step = np.divide(quotas - amount[i], slope[i], out=np.zeros(len(quotas)), where=slope[i] > 0)
+    return np.clip((mus[i] + step)[:, None] * a, minclock, limit)
+
+def nlextract_batch(resource: str, quotas, minclock=0.0) -> list:
+    """
+    nlextract for many quotas at once: [methods as in _extractMethods,
+    clocks with one row per quota and one column per method, power costs]
+    """
+    methods = _extractMethods(resource)
+    num, rate, power, limit = (np.array([x[k] for x in methods], dtype=float) for k in (2, 3, 4, 5))
+    quotas = np.atleast_1d(np.asarray(quotas, dtype=float))
+    if np.any(quotas > num @ (rate * limit)):
         raise ValueError("demanded quota too high")
-    elif quota < minclock*sum(x[2]*x[3] for x in methods):
+    elif np.any(quotas < minclock * (num @ rate)):
         raise ValueError("quota too low")
-    methods.sort(key = lambda x: x[4]/x[3])
-    solutions = dict()
-    for i in range(len(methods)+1):
-        for j in range(i,len(methods)+1):
-            q = quota - sum(x[2]*x[3]*x[5] for x in methods[:i]) - minclock * sum(x[2]*x[3] for x in methods[j:])
-            if i == j:
-                if q == 0.0:
-                    sol = tuple(x[5] for x in methods[:i]) + tuple(minclock for _ in methods[j:])
-                    solutions[sol] = sum(methods[k][2]*methods[k][4]*sol[k]**ProcPowerExponent for k in range(len(methods)))
-            elif q >= 0.0:
-                lam = q / sum(x[2] * x[3]**(1+1/(ProcPowerExponent-1)) * x[4]**(-1/(ProcPowerExponent-1)) for x in methods[i:j])
-                sol = tuple(x[5] for x in methods[:i]) + tuple(lam * (methods[k][3]/methods[k][4])**(1/(ProcPowerExponent-1)) for k in range(i,j)) + tuple(minclock for _ in methods[j:])
-                assert len(sol) == len(methods)
-                valid = True
-                for k in range(len(methods)):
-                    if sol[k] > methods[k][5] or sol[k] < minclock:
-                        valid = False
-                if valid:
-                    solutions[sol] = sum(methods[k][2]*methods[k][4]*sol[k]**ProcPowerExponent for k in range(len(methods)))
-    best = min(solutions, key= lambda x: solutions[x])
+    clocks = _waterfill(num, rate, power, limit, quotas, minclock)
+    return [methods, clocks, (clocks ** ProcPowerExponent) @ (num * power)]
+
+def nlextract(resource: str, quota: float, minclock=0.0):
+    """
+    optimal clocks for quota as [recipe name -> node count, power cost].
+    The recipes aren't registered, RecipesByName resolves their names.
+    """
+    methods, clocks, cost = nlextract_batch(resource, [quota], minclock)
     outp = dict()
     for k in range(len(methods)):
-        key = "extract_"
-        if methods[k][0] == "Resource Well Pressurizer":
-            key += "Well"
-        else:
-            key += "".join(methods[k][0].split())
-        key += "-" + "".join(resource.split()) + "-"
-        if methods[k][0] == "Resource Well Pressurizer":
-            key += str(methods[k][1])
-        else:
-            if methods[k][1] == 1:
-                key += "impure"
-            elif methods[k][1] == 2:
-                key += "normal"
-            elif methods[k][1] == 4:
-                key += "pure"
-            else:
-                raise ValueError("unrecognized node purity")
-        key += "-@" + f"{best[k]*100:.7g}" + "%"
-        global RecipesByName, Recipes
-        if key not in RecipesByName:
-            r = ExtractRecipe(methods[k][0], resource, methods[k][1], best[k])
-            assert r.name == key
-            RecipesByName[key] = r
-            Recipes.append(r)
+        # validates the clock, named by extractPrefix and clockSuffix
+        key = ExtractRecipe(methods[k][0], resource, methods[k][1], clocks[0][k]).name
         outp[key] = methods[k][2]
-    return [dict((x,outp[x]) for x in sorted(outp)), solutions[best]]
+    return [dict((x,outp[x]) for x in sorted(outp)), cost[0]]
 
 def shadowprice(target, unfueled_APAs, fueled_APAs, resource):
     if resource == "power":
@@ -1228,6 +3402,358 @@ def shadowprice(target, unfueled_APAs, fueled_APAs, resource):
 def shadowprices(target, unfueled_APAs, fueled_APAs):
     return dict((res,shadowprice(target,unfueled_APAs,fueled_APAs,res)) for res in ["power",] + Items)
 
+def _rowlabels(lp: ModelView) -> list:
+    """shadowprices_dual keys of the A_ub rows followed by the A_eq rows"""
+    m = lp.model
+    labels = ["power"] + list(m.nodeclasses)
+    if lp.buildlimit is not None:
+        labels.append("buildings")
+    return labels + ["Somersloops"] + list(m.items)
+
+def shadowprices_dual(target, unfueled_APAs, fueled_APAs, item_offsets=dict()):
+    """
+    shadowprices() from the duals of a single solve: objective gained per
+    extra unit of every item but the target, of "power" (per MW of
+    FreeExtraPower), of each node class and of "Somersloops". Where the
+    optimal basis is degenerate in a row, so its price differs left and
+    right, that entry is (left, right) from finite differences on the
+    resident model instead, like shadowprice(), with nan for a side that
+    makes the LP infeasible. Without highspy all prices come from the duals
+    unchecked.
+    """
+    lp = compiled_model().view(target, unfueled_APAs, fueled_APAs, item_offsets, 0.0, None)
+    labels = _rowlabels(lp)
+    n_ub = A_ub_rows(lp)
+    scale = 1/1000.0 if target == "ProjectAssembly4" else 1.0
+    # right-hand side change per unit, FreeExtraPower enters FreePower boosted when it is positive
+    per_unit = np.ones(len(labels))
+    if FreeExtraPower >= 0:
+        per_unit[0] = 1 + (unfueled_APAs + 3 * fueled_APAs)/10
+    unit = np.ones(len(labels)) # finite difference steps, 10 MW for power like shadowprice()
+    unit[0] = 10.0
+    if not _resident():
+        res = _linprog(lp.c, lp.A_ub, lp.b_ub, lp.A_eq, lp.b_eq)
+        if res.status != 0:
+            raise ValueError("Couldn't solve for "+str(target)+": "+str(res.message))
+        dual = np.concatenate([res.ineqlin.marginals, res.eqlin.marginals])
+        degenerate = np.zeros(len(labels), dtype=bool)
+    else:
+        model = HighsLP(lp.c, lp.A_ub, lp.b_ub, lp.A_eq, lp.b_eq)
+        res = model.solve()
+        if res.status != 0:
+            raise ValueError("Couldn't solve for "+str(target)+": "+str(res.message))
+        dual = np.concatenate([res.ineqlin.marginals, res.eqlin.marginals])
+        _, ranging = model.h.getRanging()
+        b = np.concatenate([lp.b_ub, lp.b_eq])
+        tol = 1e-9 * np.maximum(1.0, np.abs(b))
+        # the basis stays optimal on [dn, up]; an empty side means a kink at b
+        degenerate = (np.array(ranging.row_bound_up.value_) - b <= tol) | (b - np.array(ranging.row_bound_dn.value_) <= tol)
+    prices = dict()
+    for i, label in enumerate(labels):
+        if label == target:
+            continue
+        if not degenerate[i]:
+            prices[label] = -dual[i] * per_unit[i] * scale
+            continue
+        sides = []
+        for delta in (-unit[i] * per_unit[i], unit[i] * per_unit[i]):
+            if i < n_ub:
+                b_ub = lp.b_ub.copy()
+                b_ub[i] += delta
+                model.set_b_ub(b_ub)
+            else:
+                b_eq = lp.b_eq.copy()
+                b_eq[i - n_ub] += delta
+                model.set_b_eq(b_eq)
+            r = model.solve()
+            sides.append(-r.fun * scale if r.status == 0 else np.nan)
+        model.set_b_ub(lp.b_ub)
+        model.set_b_eq(lp.b_eq)
+        v0 = -res.fun * scale
+        left, right = (v0 - sides[0]) / unit[i], (sides[1] - v0) / unit[i]
+        if abs(left - right) < 1e-4:
+            prices[label] = (left + right)/2
+        else:
+            prices[label] = (left, right)
+    return prices
+
+class SensitivityReport:
+    """
+    Ranging of one optimal basis, see sensitivity(). Row arrays follow
+    rows (power budget, node classes, building limit, sloop budget, items),
+    recipe arrays follow recipes; row() and recipe() look single entries up.
+    - rhs, rhs_lo, rhs_hi: right-hand side and the range it can move in
+      before the optimal basis changes
+    - price: objective value per unit of right-hand side inside that range
+    - activity, gain, gain_lo, gain_hi: recipe multiplicity, its objective
+      value per execution and the range that value can move in with the
+      same plan staying optimal
+    """
+    def __init__(self, rows, rhs, rhs_lo, rhs_hi, price, recipes, activity, gain, gain_lo, gain_hi):
+        self.rows = rows
+        self.rhs = rhs
+        self.rhs_lo = rhs_lo
+        self.rhs_hi = rhs_hi
+        self.price = price
+        self.recipes = recipes
+        self.activity = activity
+        self.gain = gain
+        self.gain_lo = gain_lo
+        self.gain_hi = gain_hi
+        self._rows = dict((label, i) for i, label in enumerate(rows))
+        self._recipes = dict((name, i) for i, name in enumerate(recipes))
+
+    def row(self, label) -> tuple:
+        """(rhs_lo, rhs, rhs_hi, price) of an item, node class, "power", "buildings" or "Somersloops" """
+        i = self._rows[label]
+        return (self.rhs_lo[i], self.rhs[i], self.rhs_hi[i], self.price[i])
+
+    def recipe(self, name: str) -> tuple:
+        """(gain_lo, gain, gain_hi, activity) of a recipe"""
+        i = self._recipes[name]
+        return (self.gain_lo[i], self.gain[i], self.gain_hi[i], self.activity[i])
+
+    def __repr__(self):
+        return ("sensitivity: " + str(len(self.rows)) + " rows, " + str(len(self.recipes)) + " recipes")
+
+def sensitivity(target, unfueled_APAs, fueled_APAs, item_offsets=dict(), buildlimit=None) -> SensitivityReport:
+    """
+    RHS and objective ranging of the solve_sub model for target, all from
+    the ranging of one optimal HiGHS basis. Needs highspy.
+    """
+    if highspy is None:
+        raise ImportError("sensitivity() requires highspy")
+    lp = compiled_model().view(target, unfueled_APAs, fueled_APAs, item_offsets, 0.0, buildlimit)
+    m = lp.model
+    model = HighsLP(lp.c, lp.A_ub, lp.b_ub, lp.A_eq, lp.b_eq)
+    res = model.solve()
+    if res.status != 0:
+        raise ValueError("Couldn't solve for "+str(target)+": "+str(res.message))
+    _, ranging = model.h.getRanging()
+    scale = 1/1000.0 if target == "ProjectAssembly4" else 1.0
+    rhs = np.concatenate([lp.b_ub, lp.b_eq])
+    price = -np.concatenate([res.ineqlin.marginals, res.eqlin.marginals]) * scale
+    # the LP minimizes cost = -gain/scale, so cost ranges flip
+    gain = 0.0 - np.asarray(lp.c) * scale
+    gain_lo = -np.array(ranging.col_cost_up.value_) * scale
+    gain_hi = -np.array(ranging.col_cost_dn.value_) * scale
+    return SensitivityReport(_rowlabels(lp), rhs, np.array(ranging.row_bound_dn.value_), np.array(ranging.row_bound_up.value_), price,
+                             [m.name(i) for i in range(m.n)], res.x, gain, gain_lo, gain_hi)
+
+def parametric(target, unfueled_APAs, fueled_APAs, parameter, lo: float, hi: float, item_offsets=dict()):
+    """
+    exact piecewise linear optimal value of target while one parameter sweeps
+    [lo, hi]. parameter is an item (its total offset), "power"
+    (FreeExtraPower), a node class (its node count) or "Somersloops"
+    (TotalSomersloops). Moves from breakpoint to breakpoint along the HiGHS
+    ranging of each optimal basis, re-solving warm just past each one.
+    Returns breakpoints, objective values at them and slopes in between, restricted to
+    the part of [lo, hi] where the LP is feasible. Needs highspy.
+    """
+    if highspy is None:
+        raise ImportError("parametric() requires highspy")
+    if parameter == target:
+        raise ValueError("The target can't be the parameter.")
+    lp = compiled_model().view(target, unfueled_APAs, fueled_APAs, item_offsets, 0.0, None)
+    labels = _rowlabels(lp)
+    if parameter not in labels or parameter == "buildings":
+        raise ValueError("Unknown parameter: "+str(parameter))
+    row = labels.index(parameter)
+    b0 = np.concatenate([lp.b_ub, lp.b_eq])[row]
+    # parameter value t -> right-hand side, and where that map has kinks
+    kinks = []
+    if parameter == "power":
+        current = FreeExtraPower
+        rhs = lambda t: FreePower(unfueled_APAs, fueled_APAs, extra=t)
+        kinks = [0.0]
+    elif parameter == "Somersloops":
+        current = TotalSomersloops
+        rhs = lambda t: t - 10 * (unfueled_APAs + fueled_APAs)
+    elif parameter in item_offsets:
+        current = item_offsets[parameter]
+        rhs = lambda t: b0 + t - current
+    elif parameter in lp.model.itemrows:
+        current = 0.0
+        rhs = lambda t: b0 + t
+    else:
+        current = b0
+        rhs = lambda t: t
+    scale = 1/1000.0 if target == "ProjectAssembly4" else 1.0
+    model = HighsLP(lp.c, lp.A_ub, lp.b_ub, lp.A_eq, lp.b_eq)
+
+    def at(t):
+        model.set_rhs(row, rhs(t))
+        return model.solve()
+
+    def trace(t0, end, direction):
+        """[(t, value)], [slope] from t0 towards end"""
+        res = at(t0)
+        if res.status != 0:
+            return [], []
+        p, vp = t0, -res.fun * scale
+        points, slopes = [(t0, vp)], []
+        h0 = h = 1e-7 * max(1.0, abs(end - t0))
+        while direction * (end - points[-1][0]) > 0:
+            _, ranging = model.h.getRanging()
+            bound = ranging.row_bound_up.value_[row] if direction > 0 else ranging.row_bound_dn.value_[row]
+            price = -res.ineqlin.marginals[row] if row < model.n_ub else -res.eqlin.marginals[row - model.n_ub]
+            # slope and reach in terms of t on the current side of any kink
+            dt = (rhs(p + direction * h) - rhs(p)) / (direction * h)
+            slope = price * dt * scale
+            reach = p + (bound - rhs(p)) / dt if np.isfinite(bound) else direction * np.inf
+            stop = min(reach, end) if direction > 0 else max(reach, end)
+            for k in kinks:
+                if direction * (k - p) > 0 and direction * (stop - k) > 0:
+                    stop = k
+            progressed = direction * (stop - points[-1][0]) > h0
+            if progressed:
+                points.append((stop, vp + slope * (stop - p)))
+                slopes.append(slope)
+            if direction * (end - stop) <= 0:
+                break
+            if progressed:
+                h = h0
+                p = stop + direction * h
+            else:
+                # degenerate at p, step further past it
+                h *= 2
+                p += direction * h
+            res = at(p)
+            if res.status != 0:
+                break
+            vp = -res.fun * scale
+        return points, slopes
+
+    start = min(max(current, lo), hi)
+    up, s_up = trace(start, hi, 1)
+    down, s_down = trace(start, lo, -1)
+    if not up:
+        raise ValueError("Infeasible at "+str(parameter)+" = "+str(start))
+    points = down[::-1] + up[1:]
+    slopes = s_down[::-1] + s_up
+    # bases that change without changing the slope aren't breakpoints
+    keep = [0] + [i for i in range(1, len(slopes)) if abs(slopes[i] - slopes[i-1]) > 1e-9 * max(1.0, abs(slopes[i]))] + [len(slopes)]
+    points = [points[i] for i in keep]
+    slopes = [slopes[i] for i in keep[:-1]]
+    model.set_rhs(row, b0)
+    return OptimizeResult(parameter=parameter, breakpoints=np.array([t for t, _ in points]), objective=np.array([v for _, v in points]), slopes=np.array(slopes))
+
+def _fraction(v) -> Fraction:
+    """the decimal a float was written as, e.g. 999.26898 -> 99926898/100000"""
+    return Fraction(repr(float(v)))
+
+def _rational_solve(rows: list, rhs: list) -> dict:
+    """
+    solves the square system given as sparse rows (dicts column -> Fraction)
+    exactly by Gaussian elimination, pivoting on the sparsest row and column
+    to limit fill-in. Returns column -> value.
+    """
+    rows = [dict(r) for r in rows]
+    rhs = list(rhs)
+    colrows = dict()
+    for i, r in enumerate(rows):
+        for j in r:
+            colrows.setdefault(j, set()).add(i)
+    remaining = set(range(len(rows)))
+    pivots = []
+    while remaining:
+        i = min(remaining, key=lambda k: len(rows[k]))
+        if not rows[i]:
+            raise ZeroDivisionError("singular basis")
+        j = min(rows[i], key=lambda col: len(colrows[col]))
+        remaining.remove(i)
+        pivots.append((i, j))
+        pivot = rows[i][j]
+        for k in list(colrows[j]):
+            if k not in remaining:
+                continue
+            factor = rows[k][j] / pivot
+            for col, v in rows[i].items():
+                new = rows[k].get(col, 0) - factor * v
+                if new == 0:
+                    rows[k].pop(col, None)
+                    colrows[col].discard(k)
+                else:
+                    rows[k][col] = new
+                    colrows[col].add(k)
+            rhs[k] -= factor * rhs[i]
+    x = dict()
+    for i, j in reversed(pivots):
+        x[j] = (rhs[i] - sum(v * x[col] for col, v in rows[i].items() if col != j)) / rows[i][j]
+    return x
+
+def solve_exact(target, unfueled_APAs, fueled_APAs, item_offsets=dict()):
+    """
+    solves in floating point, then recomputes the final basis exactly: the
+    data are read as the decimals they were written as (Fractions), the
+    basis system is solved once in rational arithmetic and primal and dual
+    feasibility are checked exactly. Needs highspy for the basis.
+    Returns recipes (name -> Fraction multiplicity), value (Fraction), and
+    primal_feasible, dual_feasible and optimal flags. Coefficients that are
+    irrational to begin with, like clock**ProcPowerExponent, are exact only
+    up to their float value.
+    """
+    if highspy is None:
+        raise ImportError("solve_exact() requires highspy")
+    lp = compiled_model().view(target, unfueled_APAs, fueled_APAs, item_offsets, 0.0, None)
+    m = lp.model
+    model = HighsLP(lp.c, lp.A_ub, lp.b_ub, lp.A_eq, lp.b_eq)
+    res = model.solve()
+    if res.status != 0:
+        raise ValueError("Couldn't solve for "+str(target)+": "+str(res.message))
+    basis = model.h.getBasis()
+    basic = highspy.HighsBasisStatus.kBasic
+    cols = [j for j, st in enumerate(basis.col_status) if st == basic]
+    A = vstack([lp.A_ub, lp.A_eq], format="csr")
+    b = [_fraction(v) for v in np.concatenate([lp.b_ub, lp.b_eq])]
+    n_ub = model.n_ub
+    # rows whose slack is nonbasic hold at their bound and determine the basic columns
+    tight = [i for i, st in enumerate(basis.row_status) if st != basic]
+    if len(tight) != len(cols):
+        raise ValueError("basis is not square")
+    colset = set(cols)
+    rows = []
+    for i in tight:
+        lo, hi = A.indptr[i], A.indptr[i+1]
+        rows.append(dict((int(j), _fraction(v)) for j, v in zip(A.indices[lo:hi], A.data[lo:hi]) if j in colset))
+    x = _rational_solve(rows, [b[i] for i in tight])
+    c = dict((j, _fraction(lp.c[j])) for j in np.flatnonzero(lp.c))
+    # duals of the tight rows from the transposed system, the other rows' are zero
+    At = A.tocsc()
+    position = dict((i, k) for k, i in enumerate(tight))
+    rows = []
+    for j in cols:
+        lo, hi = At.indptr[j], At.indptr[j+1]
+        rows.append(dict((position[int(i)], _fraction(v)) for i, v in zip(At.indices[lo:hi], At.data[lo:hi]) if int(i) in position))
+    y = _rational_solve(rows, [c.get(j, Fraction(0)) for j in cols])
+    # primal: basic columns nonnegative, every row within its bound exactly
+    primal = all(v >= 0 for v in x.values())
+    for i in range(A.shape[0]):
+        lo, hi = A.indptr[i], A.indptr[i+1]
+        act = sum((_fraction(v) * x[int(j)] for j, v in zip(A.indices[lo:hi], A.data[lo:hi]) if int(j) in x), Fraction(0))
+        if (act > b[i]) if i < n_ub else (act != b[i]):
+            primal = False
+            break
+    # dual: inequality duals nonpositive, reduced costs nonnegative
+    dual = all(y[position[i]] <= 0 for i in tight if i < n_ub)
+    if dual:
+        for j in range(m.n):
+            if j in colset:
+                continue
+            lo, hi = At.indptr[j], At.indptr[j+1]
+            d = c.get(j, Fraction(0)) - sum((_fraction(v) * y[position[int(i)]] for i, v in zip(At.indices[lo:hi], At.data[lo:hi]) if int(i) in position), Fraction(0))
+            if d < 0:
+                dual = False
+                break
+    value = -sum((c[j] * x[j] for j in x if j in c), Fraction(0))
+    if target == "ProjectAssembly4":
+        value /= 1000
+    recipes = dict()
+    for j in sorted(x, key=m.name):
+        if x[j] > 0 and type(m.recipe(j)) != MilestoneRecipe:
+            recipes[m.name(j)] = x[j]
+    return OptimizeResult(recipes=recipes, value=value, primal_feasible=primal, dual_feasible=dual, optimal=primal and dual)
+
 # def shadowprices(target, **kwargs):
 #     sol = solve(target, outputMatrices=True, **kwargs)
 #     # n_vars = len(sol['x'])